@@ -0,0 +1,188 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import itertools
+from datetime import datetime
+from config_manager import ConfigManager
+from video_creator import VideoCreator
+from tts import StubTTSBackend
+from metrics import metrics
+
+class StubUploader:
+    """Stand-in for YouTubeUploader that only waits, so benchmarks run offline"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.uploads = 0
+
+    def upload_video(self, video_path, title, description, thumbnail_path=None):
+        time.sleep(self.delay)
+        self.uploads += 1
+        return os.path.exists(video_path)
+
+def parse_list(cast):
+    """argparse type for comma separated values"""
+    return lambda value: [cast(part) for part in value.split(',')]
+
+def parse_resolution(value):
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the render and upload pipeline offline")
+    parser.add_argument('--items', type=parse_list(int), default=[3], help="items per run, e.g. 1,10")
+    parser.add_argument('--images', type=parse_list(int), default=[3], help="images per item")
+    parser.add_argument('--resolution', type=parse_list(parse_resolution), default=[(1280, 720)],
+                        help="frame sizes, e.g. 1280x720,640x360")
+    parser.add_argument('--fps', type=parse_list(float), default=[1.0], help="frame rates")
+    parser.add_argument('--duration', type=parse_list(float), default=[5.0], help="seconds per frame")
+    parser.add_argument('--encoder', type=parse_list(str), default=['ffmpeg'], help="ffmpeg and/or opencv")
+    parser.add_argument('--transition', type=parse_list(str), default=['none'], help="none, crossfade and/or slide")
+    parser.add_argument('--motion', type=parse_list(str), default=['none'], help="none and/or kenburns")
+    parser.add_argument('--timing', type=parse_list(str), default=['fixed'],
+                        help="fixed uses --duration per frame, audio fits frames to the narration")
+    parser.add_argument('--profile', type=parse_list(str), default=['publish'], help="encoding profiles, e.g. draft,publish")
+    parser.add_argument('--variants', action='store_true',
+                        help="render every configured video.variants output per item from one decode and one audio track")
+    parser.add_argument('--upload-delay', type=float, default=0.0, help="seconds the stub uploader waits")
+    parser.add_argument('--warm', action='store_true', help="keep caches between runs instead of starting cold")
+    parser.add_argument('--output', default=None, help="write JSON results here instead of stdout")
+    return parser.parse_args(argv)
+
+def synthetic_items(count, image_count, backgrounds, run_id):
+    """Build content items from the bundled backgrounds, unique per run so caches start cold"""
+    for n in range(count):
+        images = [backgrounds[(n + i) % len(backgrounds)] for i in range(image_count)]
+        yield {
+            'id': f"bench_{run_id}_{n}",
+            'title': f"Benchmark video {n}",
+            'description': f"Synthetic benchmark item {n} of run {run_id}. " * 4,
+            'images': images,
+            'audio_text': f"This is narration for benchmark item {n} in run {run_id}. " * 3,
+        }
+
+def summarize(samples):
+    """Aggregate a list of per-item stage timings"""
+    summary = {}
+    for stage in sorted({stage for sample in samples for stage in sample}):
+        values = [sample[stage] for sample in samples if stage in sample]
+        summary[stage] = {
+            'total': sum(values),
+            'mean': sum(values) / len(values),
+            'max': max(values),
+        }
+    return summary
+
+def run_benchmark(base_settings, config, backgrounds, work_dir, run_id, upload_delay, variants=False):
+    """Render and stub-upload one configuration, returning its measurements"""
+    settings = json.loads(json.dumps(base_settings))
+    settings['paths']['temp_dir'] = os.path.join(work_dir, 'temp')
+    settings['video'].update({
+        'width': config['resolution'][0],
+        'height': config['resolution'][1],
+        'fps': config['fps'],
+        'motion_fps': config['fps'],
+        'frame_duration': config['duration'],
+        'encoder': config['encoder'],
+        'transition': config['transition'],
+        'motion': config['motion'],
+        'profile': config['profile'],
+        'timing': config['timing'],
+    })
+
+    video_creator = VideoCreator(settings, tts_backend=StubTTSBackend())
+    uploader = StubUploader(upload_delay)
+    samples = []
+    output_bytes = 0
+    failed = 0
+    upload_seconds = 0.0
+
+    metrics.reset()
+    start = time.perf_counter()
+    for item in synthetic_items(config['items'], config['images'], backgrounds, run_id):
+        render = video_creator.create_variants if variants else video_creator.create_video
+        result = render(
+            title=item['title'],
+            description=item['description'],
+            images=item['images'],
+            audio_text=item['audio_text'],
+            item_id=item['id']
+        )
+        if not result:
+            failed += 1
+            continue
+        samples.append(dict(video_creator.stage_timings))
+        outputs = list(result.values()) if variants else [result]
+        output_bytes += sum(os.path.getsize(path) for path in outputs)
+        video_path = outputs[0]
+
+        upload_start = time.perf_counter()
+        uploader.upload_video(video_path, item['title'], item['description'])
+        upload_seconds += time.perf_counter() - upload_start
+        video_creator.cleanup(item['id'])
+    elapsed = time.perf_counter() - start
+
+    return {
+        'config': dict(config, resolution=f"{config['resolution'][0]}x{config['resolution'][1]}", variants=variants),
+        'frame_size': list(video_creator.frame_size),
+        'rendered': len(samples),
+        'failed': failed,
+        'seconds': elapsed,
+        'items_per_second': len(samples) / elapsed if elapsed else 0.0,
+        'output_bytes': output_bytes,
+        'upload_seconds': upload_seconds,
+        'stages': summarize(samples),
+        'tts_cache': video_creator.tts.cache.stats(),
+        'frame_cache': video_creator.frame_cache.stats(),
+        'metrics': metrics.snapshot(),
+    }
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    base_settings = ConfigManager().load_settings()
+    bg_dir = os.path.join(base_settings['paths']['assets_dir'], 'backgrounds')
+    backgrounds = [os.path.join(bg_dir, f) for f in sorted(os.listdir(bg_dir)) if f.endswith(('.jpg', '.png'))]
+
+    work_dir = tempfile.mkdtemp(prefix='bench_')
+    base_settings['paths']['cache_dir'] = os.path.join(work_dir, 'cache')
+
+    # Every combination of the swept options is one run
+    dimensions = ['items', 'images', 'resolution', 'fps', 'duration', 'encoder', 'transition', 'motion', 'profile', 'timing']
+    matrix = itertools.product(*(getattr(args, name) for name in dimensions))
+    runs = []
+    try:
+        for run_id, values in enumerate(matrix):
+            if not args.warm:
+                shutil.rmtree(base_settings['paths']['cache_dir'], ignore_errors=True)
+            config = dict(zip(dimensions, values))
+            result = run_benchmark(base_settings, config, backgrounds, work_dir, run_id, args.upload_delay, args.variants)
+            runs.append(result)
+            print(f"{result['config']}: {result['seconds']:.2f}s, {result['items_per_second']:.2f} items/s",
+                  file=sys.stderr)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'runs': runs,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
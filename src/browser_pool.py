@@ -0,0 +1,138 @@
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+
+class BrowserSession:
+    """A WebDriver attached to one browser tab, reused across uploads"""
+
+    def __init__(self, driver, window_handle, name):
+        self.driver = driver
+        self.window_handle = window_handle
+        self.name = name
+        self.uses = 0
+
+class BrowserSessionPool:
+    """Keep warm browser sessions alive between uploads and recycle worn-out ones
+
+    driver_factory(index) must return a new WebDriver; the index lets the factory
+    spread sessions over several debugger addresses or browser profiles.
+    """
+
+    def __init__(self, driver_factory, size=1, max_uses=20):
+        self.driver_factory = driver_factory
+        self.size = max(1, int(size))
+        self.max_uses = max(1, int(max_uses))
+        self.logger = logging.getLogger(__name__)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._next_index = 0
+        self._closed = False
+
+    def acquire(self, timeout=None):
+        """Get a healthy session, creating one if the pool is not full yet"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            session = self._next_session()
+            if session is None:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError("No browser session became available")
+                continue
+
+            if self._is_healthy(session):
+                return session
+            self.logger.warning(f"Browser session {session.name} failed its health check")
+            self._discard(session)
+
+    def _next_session(self):
+        """Take an idle session, open a new one, or wait briefly for one to be released"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        session = self._create_if_room()
+        if session is not None:
+            return session
+        try:
+            # Poll so a slot freed by a discarded session is noticed too
+            return self._idle.get(timeout=1)
+        except queue.Empty:
+            return None
+
+    def release(self, session, error=False, upload_in_flight=False):
+        """Return a session to the pool, recycling it after an error or max_uses uploads
+
+        Closing a tab aborts a file transfer still running in it, so with
+        upload_in_flight the session is dropped but its tab is left open.
+        """
+        session.uses += 1
+        if error or upload_in_flight or session.uses >= self.max_uses or self._closed:
+            reason = "an error" if error else f"{session.uses} uploads"
+            self.logger.info(f"Recycling browser session {session.name} after {reason}")
+            self._discard(session, close_tab=not upload_in_flight)
+            return
+        self._idle.put(session)
+
+    @contextmanager
+    def session(self):
+        """Borrow a session for the duration of a with block"""
+        session = self.acquire()
+        error = True
+        try:
+            yield session
+            error = False
+        finally:
+            self.release(session, error=error)
+
+    def close(self):
+        """Quit every idle session; busy ones are quit when released"""
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def _create_if_room(self):
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            index = self._next_index
+            self._next_index += 1
+            self._created += 1
+        try:
+            driver = self.driver_factory(index)
+            # A dedicated tab keeps concurrent sessions on one browser out of each other's way
+            driver.switch_to.new_window('tab')
+            session = BrowserSession(driver, driver.current_window_handle, f"session-{index}")
+            self.logger.info(f"Opened browser session {session.name}")
+            return session
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _is_healthy(self, session):
+        try:
+            session.driver.switch_to.window(session.window_handle)
+            session.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, session, close_tab=True):
+        if close_tab:
+            try:
+                session.driver.close()
+            except Exception:
+                pass
+        else:
+            self.logger.warning(f"Leaving the tab of browser session {session.name} open, an upload is still running in it")
+        try:
+            session.driver.quit()
+        except Exception as e:
+            self.logger.error(f"Error quitting browser session {session.name}: {str(e)}")
+        with self._lock:
+            self._created -= 1
@@ -0,0 +1,107 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from utils import ensure_dir_exists
+
+class DiskCache:
+    """Content-addressed file cache with size-based LRU eviction"""
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+        self.hits = 0
+        self.misses = 0
+        ensure_dir_exists(cache_dir)
+
+    @staticmethod
+    def make_key(*parts):
+        """Build a stable cache key from JSON-serializable parts"""
+        data = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def path_for(self, key, ext=''):
+        """Get the path an entry is stored at, sharded by key prefix"""
+        return os.path.join(self.cache_dir, key[:2], key + ext)
+
+    def get(self, key, ext=''):
+        """Return the cached file path for key, or None on a miss"""
+        path = self.path_for(key, ext)
+        try:
+            # Touching the entry marks it as recently used for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def read(self, key, ext=''):
+        """Get a cached entry's bytes, or None on a miss"""
+        path = self.get(key, ext)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            # Evicted by another process between the lookup and the read
+            self.hits -= 1
+            self.misses += 1
+            return None
+
+    def put_bytes(self, key, data, ext='', evict=True):
+        """Store data under key and return the cached path
+
+        Pass evict=False when storing many entries in a row and call evict() once afterwards.
+        """
+        path = self.path_for(key, ext)
+        ensure_dir_exists(os.path.dirname(path))
+        # Write to a temp file first so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        if evict:
+            self.evict()
+        return path
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for filename in files:
+                if filename.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.unlink(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+            if total <= self.max_bytes:
+                break
+        self.logger.info(f"Evicted cache entries in {self.cache_dir}, {total} bytes remain")
+
+    def stats(self):
+        """Get hit/miss counters for this cache"""
+        return {'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,147 @@
+import logging
+import numpy as np
+from PIL import Image
+from encoders import frame_counts
+
+TRANSITIONS = ('none', 'crossfade', 'slide')
+MOTIONS = ('none', 'kenburns')
+
+# Start and end of the pan, as fractions of the free room around the crop,
+# cycled through so consecutive images don't all drift the same way
+PANS = [
+    ((0.5, 0.5), (0.5, 0.5)),
+    ((0.0, 0.5), (1.0, 0.5)),
+    ((0.5, 0.0), (0.5, 1.0)),
+    ((1.0, 1.0), (0.0, 0.0)),
+]
+
+class Compositor:
+    """Turn stills into video frames with transitions and Ken Burns pan/zoom
+
+    Frames are computed a block at a time with whole-array NumPy operations and
+    yielded one by one, so at most one block of frames is held in memory and the
+    encoder can consume them as they are produced.
+    """
+
+    def __init__(self, settings, block_size=4):
+        video = settings['video']
+        self.frame_size = (video['width'], video['height'])
+        self.fps = float(video.get('motion_fps', 30))
+        self.transition = video.get('transition', 'none')
+        self.transition_duration = float(video.get('transition_duration', 1.0))
+        self.motion = video.get('motion', 'none')
+        self.zoom = float(video.get('motion_zoom', 0.1))
+        self.block_size = max(1, int(block_size))
+        self.logger = logging.getLogger(__name__)
+
+        if self.transition not in TRANSITIONS:
+            raise ValueError(f"Unknown transition: {self.transition}")
+        if self.motion not in MOTIONS:
+            raise ValueError(f"Unknown motion: {self.motion}")
+
+    @property
+    def enabled(self):
+        """Whether frames differ from plain stills, otherwise encode_stills is much cheaper"""
+        return self.transition != 'none' or self.motion != 'none'
+
+    def cache_key_parts(self):
+        """Settings that change the generated frames"""
+        return [self.fps, self.frame_size, self.transition, self.transition_duration, self.motion, self.zoom]
+
+    def frames(self, segments, motions=None):
+        """Yield HxWx3 uint8 RGB frames for (image, duration) segments
+
+        Args:
+            segments (list): (PIL image, seconds) pairs shown in order
+            motions (list, optional): Motion per segment, defaults to the configured motion
+        """
+        motions = motions or [self.motion] * len(segments)
+        counts = frame_counts([duration for _, duration in segments], self.fps)
+        overlap = int(round(self.transition_duration * self.fps)) if self.transition != 'none' else 0
+
+        # Only the current and the next source are kept decoded
+        current = self._prepare(segments[0][0], motions[0])
+        for index, count in enumerate(counts):
+            has_next = index + 1 < len(segments)
+            upcoming = self._prepare(segments[index + 1][0], motions[index + 1]) if has_next else None
+            # The transition takes up the last frames of this segment
+            fade = min(overlap, count - 1) if has_next else 0
+            fade_start = count - fade
+
+            for start in range(0, count, self.block_size):
+                stop = min(count, start + self.block_size)
+                if stop <= fade_start and motions[index] == 'none':
+                    # A held still, the same array can be handed out every frame
+                    for _ in range(stop - start):
+                        yield current
+                    continue
+
+                block = self._block(current, motions[index], index, start, stop, count)
+                if stop > fade_start:
+                    first = max(start, fade_start)
+                    target = self._block(upcoming, motions[index + 1], index + 1, 0, 1, counts[index + 1])[0]
+                    progress = (np.arange(first, stop) - fade_start + 1) / (fade + 1)
+                    block[first - start:] = self._transition(block[first - start:], target, progress)
+                yield from block
+
+            current = upcoming
+
+    def _prepare(self, image, motion):
+        """Convert a PIL image to an array, oversized by the zoom factor when it will move"""
+        if motion == 'kenburns':
+            size = tuple(int(round(side * (1 + self.zoom))) for side in self.frame_size)
+        else:
+            size = self.frame_size
+        image = image.convert('RGB')
+        if image.size != size:
+            image = image.resize(size, Image.LANCZOS)
+        return np.asarray(image)
+
+    def _block(self, source, motion, index, start, stop, count):
+        """Get frames start..stop of a segment as a writable (n, H, W, 3) array"""
+        if motion == 'kenburns':
+            return self._ken_burns(source, index, start, stop, count)
+        return np.repeat(source[np.newaxis], stop - start, axis=0)
+
+    def _ken_burns(self, source, index, start, stop, count):
+        """Sample a moving, zooming crop of source for a block of frames with one gather"""
+        width, height = self.frame_size
+        source_height, source_width = source.shape[:2]
+
+        progress = np.arange(start, stop) / max(1, count - 1)
+        if index % 2:
+            # Alternate between zooming in and zooming out
+            progress = 1 - progress
+        scale = 1 + self.zoom * progress
+        crop_width = source_width / scale
+        crop_height = source_height / scale
+
+        (x_from, y_from), (x_to, y_to) = PANS[index % len(PANS)]
+        x0 = (source_width - crop_width) * (x_from + (x_to - x_from) * progress)
+        y0 = (source_height - crop_height) * (y_from + (y_to - y_from) * progress)
+
+        # Nearest source pixel for every output column and row of every frame
+        xs = (x0[:, None] + np.arange(width) * (crop_width / width)[:, None]).astype(np.intp)
+        ys = (y0[:, None] + np.arange(height) * (crop_height / height)[:, None]).astype(np.intp)
+        np.clip(xs, 0, source_width - 1, out=xs)
+        np.clip(ys, 0, source_height - 1, out=ys)
+        # One gather over flattened pixels moves whole RGB triplets, several times
+        # faster than indexing rows, columns and channels separately
+        pixels = source.reshape(-1, 3)
+        return np.take(pixels, ys[:, :, None] * source_width + xs[:, None, :], axis=0)
+
+    def _transition(self, block, target, progress):
+        """Blend a block of outgoing frames towards the first frame of the next segment"""
+        if self.transition == 'crossfade':
+            # Integer blend in 1/256 steps, exact enough and cheaper than floats
+            weight = np.round(progress * 256).astype(np.uint16)[:, None, None, None]
+            mixed = block.astype(np.uint16) * (256 - weight) + target.astype(np.uint16) * weight
+            return (mixed >> 8).astype(np.uint8)
+
+        # Slide the next image in from the right
+        width = block.shape[2]
+        out = np.empty_like(block)
+        for j, offset in enumerate(np.round(progress * width).astype(int)):
+            out[j, :, :width - offset] = block[j, :, offset:]
+            out[j, :, width - offset:] = target[:, :offset]
+        return out
@@ -1,7 +1,9 @@
 import os
 import json
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from job_store import JobStore, DONE
+from content_source import ContentSource
 
 class ConfigManager:
     def __init__(self):
@@ -12,11 +14,25 @@ class ConfigManager:
         self.settings_path = os.path.join(self.config_dir, 'settings.json')
         self.logger.info(f"Settings path: {self.settings_path}")
         
-        self.content_path = os.path.join(self.config_dir, 'content.json')
+        # Prefer a JSON Lines catalog when one is present, it streams without any parsing state
+        self.content_path = os.path.join(self.config_dir, 'content.jsonl')
+        if not os.path.exists(self.content_path):
+            self.content_path = os.path.join(self.config_dir, 'content.json')
         self.logger.info(f"Content path: {self.content_path}")
         
         self.completed_path = os.path.join(self.config_dir, 'completed.txt')
         
+        self.job_db_path = os.path.join(self.config_dir, 'jobs.sqlite3')
+        self._job_store = None
+        
+    @property
+    def job_store(self) -> JobStore:
+        """Per-item job states, opened on first use and seeded from the legacy completed.txt"""
+        if self._job_store is None:
+            self._job_store = JobStore(self.job_db_path)
+            self._job_store.import_completed(self.completed_path)
+        return self._job_store
+        
     def load_settings(self) -> Dict[str, Any]:
         """Load settings from settings.json"""
         try:
@@ -28,6 +44,10 @@ class ConfigManager:
             settings['paths']['assets_dir'] = os.path.abspath(os.path.join(base_dir, settings['paths']['assets_dir']))
             settings['paths']['temp_dir'] = os.path.abspath(os.path.join(base_dir, settings['paths']['temp_dir']))
             settings['paths']['font_path'] = os.path.abspath(os.path.join(base_dir, settings['paths']['font_path']))
+            settings['paths']['cache_dir'] = os.path.abspath(os.path.join(base_dir, settings['paths'].get('cache_dir', 'assets/cache')))
+            metrics_settings = settings.setdefault('metrics', {})
+            metrics_settings['output'] = os.path.abspath(os.path.join(base_dir, metrics_settings.get('output', 'logs/metrics.prom')))
+            metrics_settings['profile_dir'] = os.path.abspath(os.path.join(base_dir, metrics_settings.get('profile_dir', 'logs/profile')))
             
             self.logger.info("Settings loaded successfully")
             return settings
@@ -39,20 +59,17 @@ class ConfigManager:
     def get_content_items(self) -> List[Dict[str, Any]]:
         """Get content items that haven't been processed yet"""
         try:
-            # Load completed items
-            completed_items = self._load_completed_items()
-            self.logger.info(f"Loaded {len(completed_items)} completed items")
-            
             # Load content items
             with open(self.content_path, 'r') as f:
                 content_items = json.load(f)
                 
             self.logger.info(f"Loaded {len(content_items)} content items from file")
             
-            # Filter out completed items
+            # Register new items and filter out completed ones
+            self.job_store.add(item['id'] for item in content_items)
             items_to_process = [
                 item for item in content_items
-                if str(item['id']) not in completed_items
+                if not self.job_store.is_done(item['id'])
             ]
             
             self.logger.info(f"Found {len(items_to_process)} items to process after filtering")
@@ -62,25 +79,22 @@ class ConfigManager:
             self.logger.error(f"Error getting content items: {str(e)}")
             return []
             
+    def iter_content_items(self, shard: Optional[Tuple[int, int]] = None,
+                           content_path: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Lazily yield unprocessed content items, optionally only those in one shard"""
+        # Pick up ids added to completed.txt by hand since the last scan
+        self.job_store.import_completed(self.completed_path)
+        return iter(ContentSource(
+            content_path or self.content_path,
+            shard=shard,
+            is_done=self.job_store.is_done
+        ))
+        
     def mark_as_completed(self, item_id: str):
         """Mark an item as completed"""
         try:
-            with open(self.completed_path, 'a') as f:
-                f.write(f"{item_id}\n")
+            self.job_store.set_state(item_id, DONE)
             self.logger.info(f"Marked item {item_id} as completed")
             
         except Exception as e:
             self.logger.error(f"Error marking item as completed: {str(e)}")
-            
-    def _load_completed_items(self) -> set:
-        """Load the set of completed item IDs"""
-        try:
-            if not os.path.exists(self.completed_path):
-                return set()
-                
-            with open(self.completed_path, 'r') as f:
-                return set(line.strip() for line in f if line.strip())
-                
-        except Exception as e:
-            self.logger.error(f"Error loading completed items: {str(e)}")
-            return set() 
\ No newline at end of file
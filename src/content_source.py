@@ -0,0 +1,110 @@
+import json
+import zlib
+import logging
+
+def parse_shard(value):
+    """Parse an 'i/n' shard spec into (index, count)"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected i/n such as 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{value}', index must be between 0 and {count - 1}")
+    return index, count
+
+def shard_of(item_id, count):
+    """Get the shard an item id belongs to, stable across hosts and runs"""
+    return zlib.crc32(str(item_id).encode('utf-8')) % count
+
+class ContentSource:
+    """Lazily read content items from a JSON Lines file or a JSON array
+
+    Items are parsed one at a time, so memory use does not grow with the size of
+    the catalog and the first item is available before the file is fully read.
+    """
+
+    def __init__(self, path, shard=None, is_done=None, chunk_size=64 * 1024):
+        """Initialize ContentSource
+
+        Args:
+            path (str): .jsonl file with one item per line, or .json file holding an array
+            shard (tuple, optional): (index, count) to only yield this host's share of items
+            is_done (callable, optional): is_done(item_id) -> bool to skip finished items
+            chunk_size (int): Bytes read at a time when parsing a JSON array
+        """
+        self.path = path
+        self.shard = shard
+        self.is_done = is_done
+        self.chunk_size = chunk_size
+        self.logger = logging.getLogger(__name__)
+
+    def __iter__(self):
+        read = 0
+        yielded = 0
+        raw_items = self._read_jsonl() if self.path.endswith('.jsonl') else self._read_json_array()
+        for item in raw_items:
+            read += 1
+            if self.shard and shard_of(item['id'], self.shard[1]) != self.shard[0]:
+                continue
+            if self.is_done and self.is_done(item['id']):
+                continue
+            yielded += 1
+            yield item
+        self.logger.info(f"Read {read} content items from {self.path}, {yielded} to process")
+
+    def _read_jsonl(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    self.logger.error(f"Skipping invalid line {line_number} in {self.path}: {str(e)}")
+
+    def _read_json_array(self):
+        """Decode the elements of a top-level JSON array one by one"""
+        decoder = json.JSONDecoder()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            buffer = ''
+            pos = 0
+            eof = False
+            started = False
+
+            while True:
+                # Skip whitespace and separators between elements
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                    pos += 1
+
+                if pos >= len(buffer):
+                    if eof:
+                        raise ValueError(f"Unexpected end of file in {self.path}")
+                    chunk = f.read(self.chunk_size)
+                    eof = not chunk
+                    buffer, pos = chunk, 0
+                    continue
+
+                if not started:
+                    if buffer[pos] != '[':
+                        raise ValueError(f"{self.path} does not contain a JSON array")
+                    started = True
+                    pos += 1
+                    continue
+
+                if buffer[pos] == ']':
+                    return
+
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    # The element continues in the next chunk
+                    chunk = f.read(self.chunk_size)
+                    eof = not chunk
+                    buffer, pos = buffer[pos:] + chunk, 0
+                    continue
+
+                yield item
+                pos = end
@@ -0,0 +1,82 @@
+import os
+import signal
+import logging
+import threading
+
+class ContentWatcher:
+    """Poll a content catalog and report when it has been modified
+
+    A stat call per poll is all it costs, so the catalog is only re-read after
+    it actually changed.
+    """
+
+    def __init__(self, path, poll_interval=30):
+        self.path = path
+        self.poll_interval = max(0.1, float(poll_interval))
+        self._signature = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed(self):
+        """Check whether the catalog differs from the last check, True on the first call if it exists"""
+        signature = self._stat()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        return signature is not None
+
+    def wait_for_change(self, stop_event):
+        """Block until the catalog changes, returning False if stop_event was set first"""
+        while not stop_event.is_set():
+            if self.changed():
+                return True
+            stop_event.wait(self.poll_interval)
+        return False
+
+class Daemon:
+    """Keep one pipeline running and feed it whatever is new in the content catalog
+
+    Render workers, the browser sessions and the upload workers are started
+    once. Each time the catalog changes it is streamed again; finished items are
+    skipped and in-flight ones fail to be claimed, so only new or retryable
+    items are rendered, and unchanged stages of those are reused.
+    """
+
+    def __init__(self, pipeline, config_manager, content_path=None, shard=None, poll_interval=30):
+        self.pipeline = pipeline
+        self.config_manager = config_manager
+        self.content_path = content_path or config_manager.content_path
+        self.shard = shard
+        self.watcher = ContentWatcher(self.content_path, poll_interval)
+        self.logger = logging.getLogger(__name__)
+        self._stop = threading.Event()
+
+    def run(self):
+        """Process catalog changes until stop is called or the process gets SIGINT or SIGTERM"""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+        self.logger.info(f"Watching {self.content_path} every {self.watcher.poll_interval:g}s")
+        self.pipeline.start()
+        try:
+            while self.watcher.wait_for_change(self._stop):
+                self.logger.info("Content changed, looking for new items")
+                self.pipeline.render(self.config_manager.iter_content_items(
+                    shard=self.shard, content_path=self.content_path
+                ))
+                self.logger.info(f"Caught up with the catalog: {self.pipeline.stats}")
+        except KeyboardInterrupt:
+            self.logger.info("Stopping daemon")
+        finally:
+            self.pipeline.stop(wait=False)
+        return dict(self.pipeline.stats)
+
+    def stop(self):
+        """Make run return, without waiting for queued uploads or upload slots"""
+        self._stop.set()
+        self.pipeline.cancel()
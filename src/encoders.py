@@ -0,0 +1,261 @@
+import os
+import logging
+import subprocess
+import numpy as np
+from metrics import metrics
+
+def get_profile(settings):
+    """Get the encoding profile selected by settings['video']['profile'], empty if none are configured"""
+    video = settings['video']
+    profiles = video.get('profiles', {})
+    name = video.get('profile')
+    if not name:
+        return {}
+    if name not in profiles:
+        raise ValueError(f"Unknown encoding profile: {name}")
+    return profiles[name]
+
+def apply_profile(settings, name=None):
+    """Get a copy of settings using profile name, or the configured one, including its resolution"""
+    settings = dict(settings, video=dict(settings['video']))
+    if name:
+        settings['video']['profile'] = name
+    profile = get_profile(settings)
+    for key in ('width', 'height'):
+        if key in profile:
+            settings['video'][key] = profile[key]
+    return settings
+
+def frame_counts(durations, fps):
+    """Get how many frames each duration spans at fps, rounding on the running total so the sum doesn't drift"""
+    counts = []
+    elapsed = 0.0
+    shown = 0
+    for duration in durations:
+        elapsed += duration
+        count = max(1, int(round(elapsed * fps)) - shown)
+        counts.append(count)
+        shown += count
+    return counts
+
+def _rgb_array(frame):
+    """Get a frame, given as a PIL image or an HxWx3 uint8 array, as a contiguous RGB array"""
+    if isinstance(frame, np.ndarray):
+        return np.ascontiguousarray(frame)
+    return np.asarray(frame.convert('RGB'))
+
+class FFmpegEncoder:
+    """Encode the video track with ffmpeg and mux the audio in with a stream copy"""
+
+    # Container used for the silent video track
+    video_ext = '.mp4'
+    # Stills are written as variable frame rate, one frame each, so video.fps doesn't apply
+    stills_use_fps = False
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.profile = get_profile(settings)
+        self.logger = logging.getLogger(__name__)
+
+    def encode_stills(self, segments, output_path):
+        """Encode (frame_path, duration) segments, reading each image only once"""
+        list_path = os.path.splitext(output_path)[0] + '.ffconcat'
+
+        # The concat demuxer holds each image for its duration and variable frame
+        # rate output keeps it as a single frame, so the cost no longer grows with
+        # duration x fps the way duplicated frames did
+        lines = ["ffconcat version 1.0"]
+        for frame_path, duration in segments:
+            lines.append(f"file {self._quote(frame_path)}")
+            lines.append(f"duration {duration:.3f}")
+        # The last entry has to be repeated for its duration to be honoured
+        lines.append(f"file {self._quote(segments[-1][0])}")
+        with open(list_path, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+
+        self.logger.info(f"Encoding {len(segments)} still segments with ffmpeg to: {output_path}")
+        _run_ffmpeg([
+            'ffmpeg', '-y', '-loglevel', 'error', '-xerror',
+            '-f', 'concat', '-safe', '0',
+            '-i', list_path,
+            '-fps_mode', 'vfr',
+            '-vf', 'format=yuv420p',
+            *self._x264_args(still=True),
+            '-an',
+            output_path
+        ], 'ffmpeg')
+
+    def encode_frames(self, frames, output_path, fps=None):
+        """Stream frames from memory to ffmpeg's stdin, one input frame per output frame
+
+        Frames may be PIL images or HxWx3 uint8 RGB arrays and are encoded at fps,
+        the configured video fps by default.
+        """
+        frames = iter(frames)
+        first = _rgb_array(next(frames))
+        height, width = first.shape[:2]
+
+        command = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'rgb24',
+            '-s', f'{width}x{height}',
+            '-r', str(fps or self.settings['video']['fps']),
+            '-i', '-',
+            *self._x264_args(still=False),
+            '-pix_fmt', 'yuv420p',
+            '-an',
+            output_path
+        ]
+        self.logger.info(f"Streaming frames to ffmpeg: {output_path}")
+        with metrics.timer('ffmpeg_seconds', encoder='ffmpeg'):
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+            try:
+                # Arrays are written through the buffer protocol without an extra copy
+                process.stdin.write(first)
+                for frame in frames:
+                    process.stdin.write(_rgb_array(frame))
+                process.stdin.close()
+            except BrokenPipeError:
+                # ffmpeg exited early, its stderr explains why
+                pass
+            stderr = process.stderr.read()
+            process.wait()
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with code {process.returncode}: {stderr.decode(errors='replace').strip()}")
+
+    def mux(self, video_path, audio_path, output_path):
+        """Combine the video track and narration without re-encoding the video"""
+        self.logger.info(f"Creating final video at: {output_path}")
+        _run_ffmpeg(_mux_command(video_path, audio_path, output_path, self.profile), 'ffmpeg')
+
+    def _x264_args(self, still):
+        """Get the libx264 options of the encoding profile
+
+        Stills are encoded once per segment, so they use the preset and
+        stillimage tuning; every streamed motion frame is encoded, so those use
+        the usually faster motion_preset.
+        """
+        profile = self.profile
+        if still:
+            preset = profile.get('preset', 'medium')
+        else:
+            preset = profile.get('motion_preset', 'veryfast')
+        args = [
+            '-c:v', 'libx264',
+            '-preset', preset,
+            '-crf', str(profile.get('crf', 23)),
+        ]
+        if still:
+            args += ['-tune', profile.get('tune', 'stillimage')]
+        if profile.get('gop'):
+            args += ['-g', str(profile['gop'])]
+        if profile.get('threads') is not None:
+            args += ['-threads', str(profile['threads'])]
+        return args
+
+    def _quote(self, path):
+        """Quote a path for an ffconcat file"""
+        return "'" + os.path.abspath(path).replace("'", "'\\''") + "'"
+
+class OpenCVEncoder:
+    """Write an XVID video track with OpenCV and mux the audio in with ffmpeg
+
+    cv2 is imported on first use, so processes that only use ffmpeg never load it.
+    """
+
+    video_ext = '.avi'
+    stills_use_fps = True
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.profile = get_profile(settings)
+        self.logger = logging.getLogger(__name__)
+
+    def encode_stills(self, segments, output_path):
+        """Encode (frame_path, duration) segments into an .avi file"""
+        import cv2
+        fps = self.settings['video']['fps']
+
+        def frames():
+            for (frame_path, _), count in zip(segments, frame_counts([d for _, d in segments], fps)):
+                # Read once, OpenCV has no notion of duration so the frame is repeated
+                frame = cv2.imread(frame_path)
+                for _ in range(count):
+                    yield frame
+
+        first = cv2.imread(segments[0][0])
+        height, width, _ = first.shape
+        self._create_video_from_frames(frames(), (width, height), output_path)
+
+    def encode_frames(self, frames, output_path, fps=None):
+        """Encode PIL images or RGB arrays at fps, the configured fps by default, into an .avi file"""
+        frames = iter(frames)
+        first = self._to_bgr(next(frames))
+
+        def bgr_frames():
+            yield first
+            for frame in frames:
+                yield self._to_bgr(frame)
+
+        height, width = first.shape[:2]
+        self._create_video_from_frames(bgr_frames(), (width, height), output_path, fps)
+
+    def _to_bgr(self, image):
+        """Convert a PIL image or RGB array to the BGR array layout OpenCV expects"""
+        import cv2
+        return cv2.cvtColor(_rgb_array(image), cv2.COLOR_RGB2BGR)
+
+    def _create_video_from_frames(self, frames, size, output_path, fps=None):
+        """Create video from frames"""
+        import cv2
+        self.logger.info(f"Creating video at: {output_path}")
+
+        # Create video writer
+        fourcc = cv2.VideoWriter_fourcc(*'XVID')
+        out = cv2.VideoWriter(output_path, fourcc, float(fps or self.settings['video']['fps']), size)
+        if 'opencv_quality' in self.profile:
+            # Only honoured by some OpenCV backends, others keep their default quality
+            out.set(cv2.VIDEOWRITER_PROP_QUALITY, self.profile['opencv_quality'])
+        for frame in frames:
+            out.write(frame)
+        out.release()
+
+    def mux(self, video_path, audio_path, output_path):
+        """Combine video and audio"""
+        self.logger.info(f"Creating final video at: {output_path}")
+        _run_ffmpeg(_mux_command(video_path, audio_path, output_path, self.profile), 'opencv')
+
+def _mux_command(video_path, audio_path, output_path, profile):
+    """Build the ffmpeg command that copies the video track and encodes the narration to AAC"""
+    return [
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-i', video_path,
+        '-i', audio_path,
+        '-map', '0:v', '-map', '1:a',
+        '-c:v', 'copy',
+        # ffmpeg's native AAC encoder is stable, -strict experimental is no longer needed
+        '-c:a', 'aac',
+        '-b:a', profile.get('audio_bitrate', '128k'),
+        '-movflags', '+faststart',
+        output_path
+    ]
+
+def _run_ffmpeg(command, encoder):
+    """Run an ffmpeg command and raise if it fails"""
+    with metrics.timer('ffmpeg_seconds', encoder=encoder):
+        result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with code {result.returncode}: {result.stderr.decode(errors='replace').strip()}")
+
+ENCODERS = {
+    'ffmpeg': FFmpegEncoder,
+    'opencv': OpenCVEncoder,
+}
+
+def create_encoder(settings):
+    """Create the encoding backend selected by settings['video']['encoder']"""
+    name = settings['video'].get('encoder', 'ffmpeg')
+    if name not in ENCODERS:
+        raise ValueError(f"Unknown video encoder: {name}")
+    return ENCODERS[name](settings)
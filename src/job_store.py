@@ -0,0 +1,262 @@
+import os
+import socket
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+
+PENDING = 'pending'
+RENDERING = 'rendering'
+RENDERED = 'rendered'
+UPLOADING = 'uploading'
+DONE = 'done'
+FAILED = 'failed'
+STATES = (PENDING, RENDERING, RENDERED, UPLOADING, DONE, FAILED)
+
+# States a worker may pick an item up from; rendered items are waiting in
+# their worker's upload queue and belong to that worker
+CLAIMABLE_STATES = (PENDING, FAILED)
+# States in which an item belongs to the worker in claimed_by
+IN_FLIGHT_STATES = (RENDERING, RENDERED, UPLOADING)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    item_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    claimed_by TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state_updated ON jobs (state, updated_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+class JobStore:
+    """SQLite-backed state of every content item, safe to share between processes"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+    def _conn(self):
+        """Get this thread's connection, sqlite3 connections can't be shared across threads"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode, multi-statement changes use explicit BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def add(self, item_ids):
+        """Register items as pending, leaving already known items untouched"""
+        now = _now()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (item_id, state, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                ((str(item_id), PENDING, now, now) for item_id in item_ids)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, item_id):
+        """Get an item's row as a dict, or None if the item is unknown"""
+        row = self._conn().execute("SELECT * FROM jobs WHERE item_id = ?", (str(item_id),)).fetchone()
+        return dict(row) if row else None
+
+    def get_state(self, item_id):
+        """Get an item's state, or None if the item is unknown"""
+        job = self.get(item_id)
+        return job['state'] if job else None
+
+    def is_done(self, item_id):
+        """Check whether an item has been uploaded"""
+        return self.get_state(item_id) == DONE
+
+    def claim(self, item_id, to_state=RENDERING, from_states=CLAIMABLE_STATES, max_attempts=None):
+        """Atomically move an item into to_state, returning False if another worker has it"""
+        now = _now()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Unknown items are registered on the fly
+            conn.execute(
+                "INSERT OR IGNORE INTO jobs (item_id, state, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                (str(item_id), PENDING, now, now)
+            )
+            query = (
+                f"UPDATE jobs SET state = ?, attempts = attempts + 1, claimed_by = ?, updated_at = ? "
+                f"WHERE item_id = ? AND state IN ({','.join('?' * len(from_states))})"
+            )
+            params = [to_state, self.worker_id, now, str(item_id), *from_states]
+            if max_attempts is not None:
+                query += " AND attempts < ?"
+                params.append(max_attempts)
+            claimed = conn.execute(query, params).rowcount == 1
+            conn.execute("COMMIT")
+            return claimed
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def claim_next(self, to_state=RENDERING, from_states=CLAIMABLE_STATES, max_attempts=None):
+        """Atomically claim the longest-waiting claimable item and return its id, or None"""
+        now = _now()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            query = f"SELECT item_id FROM jobs WHERE state IN ({','.join('?' * len(from_states))})"
+            params = list(from_states)
+            if max_attempts is not None:
+                query += " AND attempts < ?"
+                params.append(max_attempts)
+            row = conn.execute(query + " ORDER BY updated_at LIMIT 1", params).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, claimed_by = ?, updated_at = ? WHERE item_id = ?",
+                (to_state, self.worker_id, now, row['item_id'])
+            )
+            conn.execute("COMMIT")
+            return row['item_id']
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def set_state(self, item_id, state, error=None):
+        """Record an item's new state and, for failures, the error message, registering unknown items"""
+        if state not in STATES:
+            raise ValueError(f"Unknown job state: {state}")
+        now = _now()
+        self._conn().execute(
+            "INSERT INTO jobs (item_id, state, last_error, created_at, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(item_id) DO UPDATE SET state = excluded.state, last_error = excluded.last_error, "
+            "updated_at = excluded.updated_at",
+            (str(item_id), state, error, now, now)
+        )
+
+    def release(self, item_ids):
+        """Give in-flight items this worker holds back as pending, without counting the attempt"""
+        item_ids = [str(item_id) for item_id in item_ids]
+        if not item_ids:
+            return 0
+        return self._conn().execute(
+            f"UPDATE jobs SET state = ?, attempts = MAX(attempts - 1, 0), claimed_by = NULL, updated_at = ? "
+            f"WHERE claimed_by = ? AND state IN ({','.join('?' * len(IN_FLIGHT_STATES))}) "
+            f"AND item_id IN ({','.join('?' * len(item_ids))})",
+            (PENDING, _now(), self.worker_id, *IN_FLIGHT_STATES, *item_ids)
+        ).rowcount
+
+    def touch(self, item_ids):
+        """Refresh updated_at of in-flight items this worker holds, so reset_stale leaves them alone"""
+        item_ids = [str(item_id) for item_id in item_ids]
+        if not item_ids:
+            return
+        self._conn().execute(
+            f"UPDATE jobs SET updated_at = ? WHERE claimed_by = ? "
+            f"AND state IN ({','.join('?' * len(IN_FLIGHT_STATES))}) "
+            f"AND item_id IN ({','.join('?' * len(item_ids))})",
+            (_now(), self.worker_id, *IN_FLIGHT_STATES, *item_ids)
+        )
+
+    def reset_stale(self, older_than):
+        """Return in-flight items whose worker is gone to pending
+
+        Items claimed by a process on this host are reset once that process has
+        exited. Holders on other hosts can't be checked, so their items are reset
+        only after older_than seconds without a touch.
+        """
+        cutoff = (datetime.now() - timedelta(seconds=older_than)).isoformat(timespec='seconds')
+        conn = self._conn()
+        rows = conn.execute(
+            f"SELECT item_id, claimed_by, updated_at FROM jobs "
+            f"WHERE state IN ({','.join('?' * len(IN_FLIGHT_STATES))})",
+            IN_FLIGHT_STATES
+        ).fetchall()
+
+        count = 0
+        for row in rows:
+            alive = self._holder_alive(row['claimed_by'])
+            if alive or (alive is None and row['updated_at'] >= cutoff):
+                continue
+            # Only if nothing changed since the read, the holder may have just moved on
+            count += conn.execute(
+                f"UPDATE jobs SET state = ?, claimed_by = NULL, updated_at = ? "
+                f"WHERE item_id = ? AND claimed_by IS ? AND updated_at = ? "
+                f"AND state IN ({','.join('?' * len(IN_FLIGHT_STATES))})",
+                (PENDING, _now(), row['item_id'], row['claimed_by'], row['updated_at'], *IN_FLIGHT_STATES)
+            ).rowcount
+        if count:
+            self.logger.info(f"Reset {count} stale jobs to pending")
+        return count
+
+    def _holder_alive(self, claimed_by):
+        """Check whether the worker in claimed_by is running, None when it is on another host"""
+        host, _, pid = (claimed_by or '').rpartition(':')
+        if host != socket.gethostname() or not pid.isdigit():
+            return None
+        pid = int(pid)
+        if pid == os.getpid():
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            # Exists, but belongs to another user
+            return True
+        return True
+
+    def counts(self):
+        """Get the number of items in each state"""
+        rows = self._conn().execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state").fetchall()
+        return {row['state']: row['n'] for row in rows}
+
+    def import_completed(self, completed_path):
+        """Mark every id listed in a legacy completed.txt as done, again whenever the file changes"""
+        try:
+            stat = os.stat(completed_path)
+        except FileNotFoundError:
+            return 0
+        signature = f"{stat.st_mtime_ns}:{stat.st_size}"
+        conn = self._conn()
+        row = conn.execute("SELECT value FROM meta WHERE key = 'completed_signature'").fetchone()
+        if row and row['value'] == signature:
+            return 0
+
+        with open(completed_path, 'r') as f:
+            item_ids = [line.strip() for line in f if line.strip()]
+
+        now = _now()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO jobs (item_id, state, created_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(item_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                ((item_id, DONE, now, now) for item_id in item_ids)
+            )
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('completed_signature', ?)", (signature,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.logger.info(f"Imported {len(item_ids)} completed items from {completed_path}")
+        return len(item_ids)
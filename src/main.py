@@ -1,14 +1,36 @@
 import os
 import sys
-import time
 import logging
+import argparse
 from datetime import datetime
 from config_manager import ConfigManager
+from content_source import parse_shard
 from video_creator import VideoCreator
-from youtube_uploader import YouTubeUploader
+from render_pool import RenderPool
+from pipeline import Pipeline
+from daemon import Daemon
+from scheduling import create_upload_limiters
+from metrics import MetricsExporter, profiling
 from utils import setup_logging, ensure_dir_exists
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="YouTube Video Automation Bot")
+    parser.add_argument('--shard', type=parse_shard, default=None,
+                        help="only process shard i of n, e.g. 0/4, so several hosts can split one catalog")
+    parser.add_argument('--content', default=None,
+                        help="content catalog to read (.json array or .jsonl), defaults to config/content.json(l)")
+    parser.add_argument('--encode-profile', default=None,
+                        help="encoding profile from video.profiles, e.g. draft for quick previews")
+    parser.add_argument('--metrics', default=None,
+                        help="write metrics here, Prometheus text or JSON by extension, defaults to metrics.output")
+    parser.add_argument('--profile', choices=['cpu', 'memory'], default=None,
+                        help="capture a cProfile or tracemalloc profile of this process into metrics.profile_dir")
+    parser.add_argument('--daemon', action='store_true',
+                        help="keep running, render new catalog items as they appear and upload on the publish schedule")
+    return parser.parse_args(argv)
+
+def main(args=None):
+    args = args or parse_args([])
     logger = logging.getLogger(__name__)
     logger.info("Starting YouTube Video Automation Bot...")
 
@@ -17,6 +39,12 @@ def main():
         logger.info("Loading configuration...")
         config_manager = ConfigManager()
         settings = config_manager.load_settings()
+        if args.encode_profile:
+            settings['video']['profile'] = args.encode_profile
+        if args.daemon:
+            # Render this many videos ahead of their publish slots
+            daemon_settings = settings.get('daemon', {})
+            settings['pipeline']['queue_size'] = daemon_settings.get('prerender_ahead', settings['pipeline'].get('queue_size', 2))
         
         # Ensure directories exist
         ensure_dir_exists(settings['paths']['assets_dir'])
@@ -27,68 +55,69 @@ def main():
         logger.info("Initializing video creator...")
         video_creator = VideoCreator(settings)
         
-        # Initialize YouTube uploader
+        # Initialize YouTube uploader, selenium is only imported by the process that uploads
         logger.info("Initializing YouTube uploader...")
-        uploader = YouTubeUploader(settings['youtube']['chrome_driver_path'])
+        from youtube_uploader import YouTubeUploader
+        uploader = YouTubeUploader(settings['youtube']['chrome_driver_path'], settings['youtube'])
         
-        # Get content items to process
+        # Stream content items to process, they are read as the pipeline needs them
         logger.info("Getting content items...")
-        items = config_manager.get_content_items()
-        logger.info(f"Found {len(items)} items to process")
+        if args.shard:
+            logger.info(f"Processing shard {args.shard[0]}/{args.shard[1]}")
+        items = config_manager.iter_content_items(shard=args.shard, content_path=args.content)
         
-        # Process each item
-        for item in items:
-            try:
-                logger.info(f"Processing content item: {item['title']}")
-                
-                # Create video
-                logger.info("Creating video...")
-                video_path = video_creator.create_video(
-                    title=item['title'],
-                    description=item['description'],
-                    images=item['images'],
-                    audio_text=item['audio_text']
-                )
-                
-                if video_path:
-                    logger.info(f"Video created successfully: {video_path}")
-                    
-                    # Video yükleme işlemi
-                    logger.info("Uploading video to YouTube...")
-                    
-                    title = f"{item['title']} - {datetime.now().strftime('%B %Y')}"
-                    description = item['description']
-                    thumbnail_path = os.path.join(settings['paths']['temp_dir'], "frame_title.png")
-                    video_path = os.path.join(settings['paths']['temp_dir'], "final_video.mp4")
-                    
-                    success = uploader.upload_video(
-                        video_path=video_path,
-                        title=title,
-                        description=description,
-                        thumbnail_path=thumbnail_path
-                    )
-                    
-                    if success:
-                        logger.info("Video uploaded successfully")
-                        config_manager.mark_as_completed(item['id'])
-                    else:
-                        logger.error("Failed to upload video")
-                        
-                    # Temp dosyaları temizle
-                    video_creator.cleanup()
-                    
-                    # Bir sonraki video için bekle
-                    time.sleep(5)
-                
-            except Exception as e:
-                logger.error(f"Error processing item {item['id']}: {str(e)}")
-                continue
+        def upload_item(item, video_path):
+            """Upload a rendered item and mark it completed"""
+            logger.info(f"Video created successfully: {video_path}")
+            
+            # Video yükleme işlemi
+            logger.info(f"Uploading video to YouTube: {item['title']}")
+            
+            title = f"{item['title']} - {datetime.now().strftime('%B %Y')}"
+            thumbnail_path = os.path.join(os.path.dirname(video_path), "frame_title.png")
+            
+            success = uploader.upload_video(
+                video_path=video_path,
+                title=title,
+                description=item['description'],
+                thumbnail_path=thumbnail_path
+            )
+            
+            if success:
+                logger.info("Video uploaded successfully")
                 
+                # Temp dosyaları temizle
+                video_creator.cleanup(item['id'])
+            else:
+                # Keep the rendered artifacts so the next run can skip straight to the upload
+                logger.error("Failed to upload video")
+            return success
+            
+        # Render in parallel while finished videos are uploaded
+        render_pool = RenderPool(settings)
+        pipeline = Pipeline(settings, render_pool, upload_item, config_manager.job_store,
+                            limiters=create_upload_limiters(settings, schedule=args.daemon))
+        metrics_settings = settings['metrics']
+        exporter = MetricsExporter(args.metrics or metrics_settings['output'],
+                                   metrics_settings.get('interval', 30)).start()
+        try:
+            with profiling(args.profile or metrics_settings.get('profile'), metrics_settings['profile_dir']):
+                if args.daemon:
+                    Daemon(pipeline, config_manager, content_path=args.content, shard=args.shard,
+                           poll_interval=settings.get('daemon', {}).get('poll_interval', 30)).run()
+                else:
+                    pipeline.run(items)
+        finally:
+            render_pool.close()
+            uploader.close()
+            exporter.stop()
+        
     except Exception as e:
         logger.error(f"Fatal error: {str(e)}")
         
     logger.info("Processing complete")
 
 if __name__ == "__main__":
+    args = parse_args()
     setup_logging()
-    main() 
\ No newline at end of file
+    main(args) 
\ No newline at end of file
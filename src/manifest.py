@@ -0,0 +1,58 @@
+import os
+import json
+import logging
+import tempfile
+from datetime import datetime
+
+class StageManifest:
+    """Per-item record of each render stage's outputs and the hash of its inputs"""
+
+    def __init__(self, job_dir):
+        self.job_dir = job_dir
+        self.path = os.path.join(job_dir, 'manifest.json')
+        self.logger = logging.getLogger(__name__)
+        self.stages = self._load()
+
+    def _load(self):
+        """Load the manifest, treating a missing or corrupt file as empty"""
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f).get('stages', {})
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            self.logger.error(f"Ignoring unreadable manifest {self.path}: {str(e)}")
+            return {}
+
+    def is_fresh(self, stage, input_hash):
+        """Check whether a stage already ran with these inputs and its outputs still exist"""
+        entry = self.stages.get(stage)
+        if not entry or entry['input_hash'] != input_hash:
+            return False
+        return all(os.path.exists(path) for path in self.outputs(stage))
+
+    def outputs(self, stage):
+        """Get the absolute output paths recorded for a stage"""
+        entry = self.stages.get(stage, {})
+        return [os.path.join(self.job_dir, name) for name in entry.get('outputs', [])]
+
+    def record(self, stage, input_hash, outputs):
+        """Record a finished stage and persist the manifest"""
+        self.stages[stage] = {
+            'input_hash': input_hash,
+            'outputs': [os.path.relpath(path, self.job_dir) for path in outputs],
+            'completed_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        self._save()
+
+    def invalidate(self, stage):
+        """Forget a stage so it is rebuilt on the next run"""
+        if self.stages.pop(stage, None) is not None:
+            self._save()
+
+    def _save(self):
+        """Write the manifest atomically so a crash never leaves it half written"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.job_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'stages': self.stages}, f, indent=2)
+        os.replace(tmp_path, self.path)
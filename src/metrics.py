@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import cProfile
+import logging
+import threading
+import tracemalloc
+from datetime import datetime
+from contextlib import contextmanager
+from utils import ensure_dir_exists
+
+# Prefix for every exported metric name
+PREFIX = 'ytbot_'
+
+class Metrics:
+    """Thread-safe counters, gauges and timers, exportable as Prometheus text or JSON
+
+    Every metric is identified by a name plus optional keyword labels, e.g.
+    metrics.observe('render_stage_seconds', 1.2, stage='video').
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        # key -> [count, total seconds, max seconds]
+        self._timers = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """Add value to a counter"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """Set a gauge to its current value"""
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        """Record one duration for a timer"""
+        key = self._key(name, labels)
+        with self._lock:
+            timer = self._timers.setdefault(key, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time the body of a with block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        """Get a JSON serializable copy of every metric"""
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        return {
+            'counters': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ],
+            'gauges': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._gauges.items())
+            ],
+            'timers': [
+                {'name': name, 'labels': dict(labels), 'count': count, 'sum': total, 'max': longest}
+                for (name, labels), (count, total, longest) in sorted(self._timers.items())
+            ],
+        }
+
+    def drain(self):
+        """Get a snapshot and reset counters and timers, so it can be merged elsewhere without double counting"""
+        with self._lock:
+            snapshot = self._snapshot()
+            self._counters.clear()
+            self._timers.clear()
+        return snapshot
+
+    def merge(self, snapshot):
+        """Add a snapshot taken in another process, e.g. a render worker, into these metrics"""
+        with self._lock:
+            for counter in snapshot.get('counters', []):
+                key = self._key(counter['name'], counter['labels'])
+                self._counters[key] = self._counters.get(key, 0) + counter['value']
+            for gauge in snapshot.get('gauges', []):
+                self._gauges[self._key(gauge['name'], gauge['labels'])] = gauge['value']
+            for entry in snapshot.get('timers', []):
+                timer = self._timers.setdefault(self._key(entry['name'], entry['labels']), [0, 0.0, 0.0])
+                timer[0] += entry['count']
+                timer[1] += entry['sum']
+                timer[2] = max(timer[2], entry['max'])
+
+    def reset(self):
+        """Forget every metric"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timers.clear()
+
+    def to_prometheus(self):
+        """Render the metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+
+        def add(name, kind, labels, value):
+            name = PREFIX + name
+            if name not in typed:
+                lines.append(f"# TYPE {name} {kind}")
+                typed.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for counter in snapshot['counters']:
+            add(counter['name'] + '_total', 'counter', counter['labels'], counter['value'])
+        for gauge in snapshot['gauges']:
+            add(gauge['name'], 'gauge', gauge['labels'], gauge['value'])
+        for entry in snapshot['timers']:
+            name = PREFIX + entry['name']
+            if name not in typed:
+                lines.append(f"# TYPE {name} summary")
+                typed.add(name)
+            labels = _format_labels(entry['labels'])
+            lines.append(f"{name}_count{labels} {entry['count']}")
+            lines.append(f"{name}_sum{labels} {entry['sum']:.6f}")
+        for entry in snapshot['timers']:
+            add(entry['name'] + '_max', 'gauge', entry['labels'], f"{entry['max']:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Atomically write the metrics to path, as JSON for .json files and Prometheus text otherwise"""
+        ensure_dir_exists(os.path.dirname(os.path.abspath(path)))
+        if path.endswith('.json'):
+            content = json.dumps(dict(self.snapshot(), updated_at=datetime.now().isoformat(timespec='seconds')), indent=2)
+        else:
+            content = self.to_prometheus()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+    return '{' + pairs + '}'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Process-wide registry every module records into
+metrics = Metrics()
+
+class MetricsExporter:
+    """Write metrics to a file every interval seconds from a background thread"""
+
+    def __init__(self, path, interval=30, registry=None):
+        self.path = path
+        self.interval = interval
+        self.registry = registry or metrics
+        self.logger = logging.getLogger(__name__)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='metrics-exporter', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread and write the final values"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._write()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def _write(self):
+        try:
+            self.registry.write(self.path)
+        except Exception as e:
+            self.logger.error(f"Error writing metrics to {self.path}: {str(e)}")
+
+@contextmanager
+def profiling(mode, output_dir):
+    """Capture a cProfile ('cpu') or tracemalloc ('memory') profile of the with block
+
+    Only the calling process is profiled; render worker processes are not, so set
+    render.workers to 1 to profile rendering.
+    """
+    logger = logging.getLogger(__name__)
+    if not mode:
+        yield
+        return
+    if mode not in ('cpu', 'memory'):
+        raise ValueError(f"Unknown profile mode: {mode}")
+
+    ensure_dir_exists(output_dir)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if mode == 'cpu':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            path = os.path.join(output_dir, f"cpu_{timestamp}.prof")
+            profiler.dump_stats(path)
+            logger.info(f"CPU profile written to: {path}")
+    else:
+        tracemalloc.start(25)
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            path = os.path.join(output_dir, f"memory_{timestamp}.txt")
+            with open(path, 'w') as f:
+                f.write(f"current={current} peak={peak}\n")
+                for stat in snapshot.statistics('lineno')[:50]:
+                    f.write(f"{stat}\n")
+            metrics.set_gauge('traced_memory_peak_bytes', peak)
+            logger.info(f"Memory profile written to: {path}")
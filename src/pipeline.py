@@ -0,0 +1,217 @@
+import time
+import queue
+import logging
+import threading
+from metrics import metrics
+from job_store import RENDERED, UPLOADING, DONE, FAILED, IN_FLIGHT_STATES
+
+# Tells an upload worker there is nothing left to upload
+_DONE = object()
+
+class Pipeline:
+    """Render and upload at the same time, connected by a bounded queue
+
+    Render results are pushed into a queue of at most queue_size finished videos.
+    When uploads fall behind the queue fills up and rendering pauses, so the
+    number of rendered-but-not-uploaded videos on disk stays bounded.
+    """
+
+    def __init__(self, settings, render_pool, upload_fn, job_store=None, limiters=None):
+        """Initialize Pipeline with settings, a RenderPool and an upload callable
+
+        upload_fn(item, video_path) returns True when the upload succeeded. With a
+        JobStore, items are claimed before rendering so several processes can share
+        one backlog, and every state change is recorded. limiters are objects with
+        acquire(stop_event) -> bool, e.g. a TokenBucket, that must all let an upload
+        through before it starts; without them uploads are spaced by upload_delay.
+        """
+        pipeline_settings = settings.get('pipeline', {})
+        job_settings = settings.get('jobs', {})
+        self.render_pool = render_pool
+        self.upload_fn = upload_fn
+        self.job_store = job_store
+        self.limiters = list(limiters or [])
+        self.max_attempts = job_settings.get('max_attempts', 3)
+        self.stale_after = job_settings.get('stale_after', 3600)
+        self.queue_size = max(1, int(pipeline_settings.get('queue_size', 2)))
+        # One upload worker per browser session unless set explicitly, extra sessions would sit idle
+        self.upload_workers = max(1, int(
+            pipeline_settings.get('upload_workers') or settings.get('youtube', {}).get('sessions', 1)
+        ))
+        self.upload_delay = float(pipeline_settings.get('upload_delay', 5))
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._ready = None
+        self._uploaders = []
+        # Ids of claimed items not finished yet, refreshed in the job store while held
+        self._held = set()
+        self._heartbeat = None
+        self._heartbeat_stop = threading.Event()
+        self.stats = {}
+        self._start = time.time()
+
+    def run(self, items):
+        """Process items and return counters for rendered, uploaded and failed videos"""
+        self.start()
+        try:
+            self.render(items)
+        except BaseException:
+            self.stop(wait=False)
+            raise
+        self.stop()
+
+        self.logger.info(f"Pipeline finished in {time.time() - self._start:.1f}s: {self.stats}")
+        return dict(self.stats)
+
+    def start(self):
+        """Start the upload workers, they keep running across render calls until stop"""
+        if self._uploaders:
+            return
+        self.stats = {'rendered': 0, 'render_failed': 0, 'uploaded': 0, 'upload_failed': 0}
+        self._ready = queue.Queue(maxsize=self.queue_size)
+        self._stopping.clear()
+        self._uploaders = [
+            threading.Thread(target=self._upload_worker, args=(self._ready,), name=f"upload-{i}", daemon=True)
+            for i in range(self.upload_workers)
+        ]
+        for thread in self._uploaders:
+            thread.start()
+
+        if self.job_store is not None:
+            self._heartbeat_stop.clear()
+            self._heartbeat = threading.Thread(target=self._heartbeat_worker, name="job-heartbeat", daemon=True)
+            self._heartbeat.start()
+        self._start = time.time()
+
+    def render(self, items):
+        """Render items and queue them for upload, returning once the last one is queued or on cancel"""
+        if self.job_store is not None:
+            self.job_store.reset_stale(self.stale_after)
+            items = self._claimed(items)
+
+        results = self.render_pool.render(items)
+        try:
+            for item, video_path in results:
+                if not video_path:
+                    self.logger.error(f"Failed to create video for item {item['id']}")
+                    self._set_state(item, FAILED, "render failed")
+                    self._count('render_failed')
+                    continue
+                self._set_state(item, RENDERED)
+                self._count('rendered')
+                # Blocks while the queue is full, which holds back further renders
+                with metrics.timer('render_blocked_seconds'):
+                    queued = self._put((item, video_path))
+                if not queued:
+                    return
+                metrics.set_gauge('upload_queue_depth', self._ready.qsize())
+        finally:
+            # Stops submitting renders and cancels the ones not started yet
+            results.close()
+
+    def cancel(self):
+        """Stop rendering and uploading as soon as possible, safe to call from any thread"""
+        self._stopping.set()
+
+    def stop(self, wait=True):
+        """Stop the upload workers once they have uploaded everything queued, or right away
+
+        Without wait, or after cancel, nothing more is uploaded and every item this
+        process still holds goes back to pending, so the next run picks it up
+        straight from its finished stages.
+        """
+        if not wait:
+            self._stopping.set()
+        for _ in self._uploaders:
+            self._ready.put(_DONE)
+        for thread in self._uploaders:
+            thread.join()
+        self._uploaders = []
+        if self._heartbeat is not None:
+            self._heartbeat_stop.set()
+            self._heartbeat.join()
+            self._heartbeat = None
+        if self._stopping.is_set():
+            self._release_held()
+
+    def _put(self, job):
+        """Queue a job for upload, returning False if the pipeline is cancelled while the queue is full"""
+        while not self._stopping.is_set():
+            try:
+                self._ready.put(job, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _release_held(self):
+        """Return claimed but unfinished items, whether rendering, queued or waiting for a limiter, to pending"""
+        with self._lock:
+            held = list(self._held)
+            self._held.clear()
+        if self.job_store is not None and held:
+            count = self.job_store.release(held)
+            self.logger.info(f"Returned {count} unfinished items to pending")
+
+    def _upload_worker(self, ready):
+        """Upload finished videos until the render side signals it is done"""
+        while True:
+            job = ready.get()
+            if job is _DONE:
+                return
+
+            item, video_path = job
+            metrics.set_gauge('upload_queue_depth', ready.qsize())
+            if not all(limiter.acquire(self._stopping) for limiter in self.limiters) or self._stopping.is_set():
+                # Still held, stop hands it back
+                continue
+            self._set_state(item, UPLOADING)
+            try:
+                success = self.upload_fn(item, video_path)
+            except Exception as e:
+                self.logger.error(f"Error uploading item {item['id']}: {str(e)}")
+                success = False
+            self._set_state(item, DONE if success else FAILED, None if success else "upload failed")
+            self._count('uploaded' if success else 'upload_failed')
+            elapsed = time.time() - self._start
+            if elapsed > 0:
+                metrics.set_gauge('items_per_hour', self.stats['uploaded'] * 3600 / elapsed)
+
+            if self.upload_delay > 0 and not self.limiters:
+                # Bir sonraki video için bekle
+                self._stopping.wait(self.upload_delay)
+
+    def _heartbeat_worker(self):
+        """Keep the held items fresh so workers on other hosts don't reclaim them as stale"""
+        interval = max(1.0, self.stale_after / 3)
+        while not self._heartbeat_stop.wait(interval):
+            with self._lock:
+                held = list(self._held)
+            try:
+                self.job_store.touch(held)
+            except Exception as e:
+                self.logger.error(f"Error refreshing held jobs: {str(e)}")
+
+    def _claimed(self, items):
+        """Yield only the items this process managed to claim, until the pipeline is cancelled"""
+        for item in items:
+            if self._stopping.is_set():
+                return
+            if self.job_store.claim(item['id'], max_attempts=self.max_attempts):
+                with self._lock:
+                    self._held.add(item['id'])
+                yield item
+            else:
+                self.logger.info(f"Skipping item {item['id']}, claimed elsewhere or out of attempts")
+
+    def _set_state(self, item, state, error=None):
+        if self.job_store is not None:
+            self.job_store.set_state(item['id'], state, error)
+            if state not in IN_FLIGHT_STATES:
+                with self._lock:
+                    self._held.discard(item['id'])
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
@@ -0,0 +1,103 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from video_creator import VideoCreator
+from metrics import metrics
+
+# Each worker process keeps its own VideoCreator for its whole lifetime
+_video_creator = None
+
+def _init_worker(settings):
+    """Set up logging and a VideoCreator inside a freshly started worker process"""
+    global _video_creator
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s'
+        )
+    _video_creator = VideoCreator(settings)
+
+def _render_item(item):
+    """Render a single content item inside a worker process
+
+    The worker's metrics since its last item are returned with the result so the
+    parent process can merge them into its own.
+    """
+    video_path = _video_creator.create_video(
+        title=item['title'],
+        description=item['description'],
+        images=item['images'],
+        audio_text=item['audio_text'],
+        item_id=item['id']
+    )
+    return item['id'], video_path, metrics.drain()
+
+class RenderPool:
+    def __init__(self, settings):
+        """Initialize RenderPool with settings"""
+        self.settings = settings
+        self.logger = logging.getLogger(__name__)
+        self.workers = max(1, int(settings.get('render', {}).get('workers', 1)))
+        # Started on first use and kept between render calls, so worker start-up is paid once
+        self._executor = None
+
+    def render(self, items):
+        """Render items and yield (item, video_path) pairs as each one finishes
+
+        Items are pulled lazily and at most one job per worker is in flight, so a
+        consumer that stops iterating also stops new renders from being submitted.
+        """
+        if self.workers == 1:
+            # No point paying for a process pool with a single worker
+            if _video_creator is None:
+                _init_worker(self.settings)
+            for item in items:
+                try:
+                    _, video_path, snapshot = _render_item(item)
+                except Exception as e:
+                    self.logger.error(f"Error rendering item {item['id']}: {str(e)}")
+                    video_path = None
+                else:
+                    metrics.merge(snapshot)
+                yield item, video_path
+            return
+
+        if self._executor is None:
+            self.logger.info(f"Rendering with {self.workers} workers")
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 initializer=_init_worker,
+                                                 initargs=(self.settings,))
+        items = iter(items)
+        pending = {}
+        try:
+            while True:
+                # Top up the pool, one job per worker
+                while len(pending) < self.workers:
+                    item = next(items, None)
+                    if item is None:
+                        break
+                    pending[self._executor.submit(_render_item, item)] = item
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    try:
+                        _, video_path, snapshot = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Error rendering item {item['id']}: {str(e)}")
+                        video_path = None
+                    else:
+                        metrics.merge(snapshot)
+                    yield item, video_path
+        finally:
+            # A consumer that stopped early leaves nothing running behind its back
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        """Shut down the worker processes"""
+        if self._executor is not None:
+            # Queued renders were already cancelled when their render call ended
+            self._executor.shutdown()
+            self._executor = None
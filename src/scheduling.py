@@ -0,0 +1,106 @@
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+
+def _sleep(seconds, stop_event=None):
+    """Sleep, returning False early if stop_event is set"""
+    if stop_event is None:
+        time.sleep(seconds)
+        return True
+    return not stop_event.wait(seconds)
+
+class TokenBucket:
+    """Allow on average rate uploads per second, with bursts of up to capacity
+
+    Tokens are reserved under a lock and waited for outside it, so several
+    upload workers can share one bucket and are released in order.
+    """
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError(f"Token rate must be positive, got {rate}")
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def _reserve(self):
+        """Take a token, going into debt if none is left, and get how long to wait for it"""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, stop_event=None):
+        """Block until a token is available, returning False if stop_event was set meanwhile"""
+        delay = self._reserve()
+        if delay > 0:
+            self.logger.info(f"Upload rate limit reached, waiting {delay:.0f}s")
+        return _sleep(delay, stop_event)
+
+class PublishSchedule:
+    """Release one upload per daily publish time, e.g. ['09:00', '18:00']
+
+    Each slot is used at most once. A slot that began less than grace seconds ago
+    can still be used, slots missed for longer are skipped rather than caught up
+    in a burst.
+    """
+
+    def __init__(self, times, grace=900, clock=datetime.now):
+        if not times:
+            raise ValueError("A publish schedule needs at least one time")
+        self.times = sorted(datetime.strptime(value, '%H:%M').time() for value in times)
+        self.grace = timedelta(seconds=grace)
+        self.clock = clock
+        self._last_slot = None
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def next_slot(self, after):
+        """Get the first publish time at or after a datetime"""
+        day = after.date()
+        while True:
+            for slot_time in self.times:
+                slot = datetime.combine(day, slot_time)
+                if slot >= after:
+                    return slot
+            day += timedelta(days=1)
+
+    def _reserve(self):
+        with self._lock:
+            earliest = self.clock() - self.grace
+            if self._last_slot is not None:
+                earliest = max(earliest, self._last_slot + timedelta(seconds=1))
+            self._last_slot = self.next_slot(earliest)
+            return self._last_slot
+
+    def acquire(self, stop_event=None):
+        """Block until the next free publish slot, returning False if stop_event was set meanwhile"""
+        slot = self._reserve()
+        delay = (slot - self.clock()).total_seconds()
+        if delay > 0:
+            self.logger.info(f"Next upload scheduled for {slot.isoformat(timespec='minutes')}")
+            return _sleep(delay, stop_event)
+        return stop_event is None or not stop_event.is_set()
+
+def create_upload_limiters(settings, schedule=False):
+    """Build the upload limiters configured in settings
+
+    pipeline.uploads_per_hour enables a token bucket with pipeline.upload_burst
+    tokens. With schedule, daemon.publish_times adds a publish schedule.
+    """
+    pipeline_settings = settings.get('pipeline', {})
+    daemon_settings = settings.get('daemon', {})
+    limiters = []
+    if schedule and daemon_settings.get('publish_times'):
+        limiters.append(PublishSchedule(daemon_settings['publish_times'], daemon_settings.get('publish_grace', 900)))
+    if pipeline_settings.get('uploads_per_hour'):
+        limiters.append(TokenBucket(float(pipeline_settings['uploads_per_hour']) / 3600,
+                                    pipeline_settings.get('upload_burst', 1)))
+    return limiters
@@ -0,0 +1,134 @@
+import re
+import logging
+from functools import lru_cache
+from PIL import ImageFont
+
+@lru_cache(maxsize=32)
+def get_font(font_path, size):
+    """Load a TrueType font once per process and share it between renders"""
+    return ImageFont.truetype(font_path, size)
+
+@lru_cache(maxsize=32)
+def get_metrics(font_path, size):
+    """Get the shared, memoizing FontMetrics for a font at a size"""
+    return FontMetrics(get_font(font_path, size))
+
+class FontMetrics:
+    """Memoized advance widths of words and characters in one font at one size
+
+    Titles and descriptions reuse the same words over and over across a batch,
+    so measuring each distinct word once replaces most calls into FreeType.
+    """
+
+    def __init__(self, font):
+        self.font = font
+        self.space = font.getlength(' ')
+        ascent, descent = font.getmetrics()
+        self.line_height = ascent + descent
+        self._widths = {}
+
+    def width(self, text):
+        """Get the advance width of text in pixels"""
+        width = self._widths.get(text)
+        if width is None:
+            width = self._widths[text] = self.font.getlength(text)
+        return width
+
+    def line_width(self, words):
+        """Get the width of words joined by single spaces"""
+        if not words:
+            return 0
+        return sum(self.width(word) for word in words) + self.space * (len(words) - 1)
+
+def wrap(text, metrics, max_width):
+    """Greedily wrap text into lines no wider than max_width pixels
+
+    Words wider than a whole line, such as long URLs or text in scripts written
+    without spaces, are broken between characters.
+    """
+    lines = []
+    for paragraph in text.splitlines() or ['']:
+        line = []
+        line_width = 0
+        for word in re.split(r'\s+', paragraph.strip()):
+            if not word:
+                continue
+            for piece in _split_wide_word(word, metrics, max_width):
+                piece_width = metrics.width(piece)
+                added = piece_width if not line else metrics.space + piece_width
+                if line and line_width + added > max_width:
+                    lines.append(' '.join(line))
+                    line, line_width = [piece], piece_width
+                else:
+                    line.append(piece)
+                    line_width += added
+        lines.append(' '.join(line))
+    # Drop blank lines at the end, keep intentional ones in between
+    while len(lines) > 1 and not lines[-1]:
+        lines.pop()
+    return lines
+
+def _split_wide_word(word, metrics, max_width):
+    if metrics.width(word) <= max_width:
+        return [word]
+    # Sum per-character advances, measuring every prefix would fill the memo
+    pieces = []
+    piece = ''
+    piece_width = 0
+    for char in word:
+        char_width = metrics.width(char)
+        if piece and piece_width + char_width > max_width:
+            pieces.append(piece)
+            piece, piece_width = char, char_width
+        else:
+            piece += char
+            piece_width += char_width
+    pieces.append(piece)
+    return pieces
+
+def fit_text(text, font_path, box_width, box_height, max_size, min_size, line_spacing=0.4):
+    """Find the largest font size at which wrapped text fits in the box
+
+    Args:
+        text (str): Text to lay out
+        font_path (str): TrueType font file
+        box_width (int): Available width in pixels
+        box_height (int): Available height in pixels
+        max_size (int): Preferred font size
+        min_size (int): Smallest acceptable size, used even if the text still overflows
+        line_spacing (float): Gap between lines as a fraction of the font size
+
+    Returns:
+        tuple: (font, lines, line_height) for the chosen size
+    """
+    low, high = min_size, max_size
+    best = None
+    # Binary search, the wrapped height shrinks as the size goes down
+    while low <= high:
+        size = (low + high) // 2
+        metrics = get_metrics(font_path, size)
+        lines = wrap(text, metrics, box_width)
+        line_height = metrics.line_height + int(size * line_spacing)
+        fits = (len(lines) * line_height - int(size * line_spacing) <= box_height
+                and all(metrics.line_width(line.split(' ')) <= box_width for line in lines))
+        if fits:
+            best = (metrics.font, lines, line_height)
+            low = size + 1
+        else:
+            high = size - 1
+
+    if best is None:
+        metrics = get_metrics(font_path, min_size)
+        logging.getLogger(__name__).warning(f"Text does not fit in {box_width}x{box_height} even at size {min_size}")
+        best = (metrics.font, wrap(text, metrics, box_width), metrics.line_height + int(min_size * line_spacing))
+    return best
+
+def draw_centered(draw, lines, font, line_height, box, fill=(0, 0, 0)):
+    """Draw lines horizontally centered in box = (left, top, width, height), starting at its top"""
+    left, top, width, _ = box
+    metrics = get_metrics(font.path, font.size)
+    y = top
+    for line in lines:
+        x = left + (width - metrics.line_width(line.split(' '))) / 2
+        draw.text((x, y), line, fill, font=font)
+        y += line_height
@@ -0,0 +1,154 @@
+import os
+import re
+import time
+import logging
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from cache import DiskCache
+
+# A silent MPEG-1 Layer III frame: 32 kbps, 44.1 kHz, mono, 1152 samples
+SILENT_MP3_FRAME = bytes([0xFF, 0xFB, 0x10, 0xC4]) + bytes(100)
+SILENT_MP3_FRAME_SECONDS = 1152 / 44100
+
+class TTSBackend(ABC):
+    """Interface for text-to-speech engines"""
+
+    # Engine name, part of the cache key so engines never share entries
+    name = None
+
+    @abstractmethod
+    def synthesize(self, text, lang, slow, output_path):
+        """Write speech for text to output_path as MP3"""
+
+    def synthesize_bytes(self, text, lang, slow):
+        """Get speech for text as MP3 bytes, through a temporary file unless overridden"""
+        fd, tmp_path = tempfile.mkstemp(suffix='.mp3')
+        os.close(fd)
+        try:
+            self.synthesize(text, lang, slow, tmp_path)
+            with open(tmp_path, 'rb') as f:
+                return f.read()
+        finally:
+            os.unlink(tmp_path)
+
+class GTTSBackend(TTSBackend):
+    """Google Translate text-to-speech (needs network access)"""
+
+    name = 'gtts'
+
+    def synthesize(self, text, lang, slow, output_path):
+        from gtts import gTTS
+        gTTS(text=text, lang=lang, slow=slow).save(output_path)
+
+    def synthesize_bytes(self, text, lang, slow):
+        from io import BytesIO
+        from gtts import gTTS
+        buffer = BytesIO()
+        gTTS(text=text, lang=lang, slow=slow).write_to_fp(buffer)
+        return buffer.getvalue()
+
+class StubTTSBackend(TTSBackend):
+    """Offline engine that writes silence sized to the text, for tests and benchmarks"""
+
+    name = 'stub'
+
+    # Rough speaking rate used to size the silence
+    words_per_second = 2.5
+
+    def __init__(self, delay=0.0):
+        """delay simulates the network round trip of a real engine, in seconds per call"""
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def synthesize(self, text, lang, slow, output_path):
+        with open(output_path, 'wb') as f:
+            f.write(self.synthesize_bytes(text, lang, slow))
+
+    def synthesize_bytes(self, text, lang, slow):
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        seconds = max(1.0, len(text.split()) / self.words_per_second)
+        if slow:
+            seconds *= 1.5
+        return SILENT_MP3_FRAME * int(seconds / SILENT_MP3_FRAME_SECONDS)
+
+TTS_BACKENDS = {
+    GTTSBackend.name: GTTSBackend,
+    StubTTSBackend.name: StubTTSBackend,
+}
+
+def register_tts_backend(backend_class):
+    """Make a TTSBackend subclass selectable through settings['tts']['engine']"""
+    TTS_BACKENDS[backend_class.name] = backend_class
+    return backend_class
+
+def split_sentences(text):
+    """Split text into sentences, keeping their punctuation"""
+    return [sentence for sentence in re.split(r'(?<=[.!?\u2026])\s+', text.strip()) if sentence]
+
+class CachedTTS:
+    """Synthesize speech through a backend, reusing earlier results from a disk cache
+
+    With chunking enabled the text is split into sentences that are cached and
+    synthesized independently, several at a time, so editing one sentence only
+    re-synthesizes that sentence. MP3 frames are self-contained, so the chunks
+    are joined by concatenating their bytes.
+    """
+
+    def __init__(self, backend, cache, lang='en', slow=False, chunked=True, workers=4):
+        self.backend = backend
+        self.cache = cache
+        self.lang = lang
+        self.slow = slow
+        self.chunked = chunked
+        self.workers = max(1, int(workers))
+        self.logger = logging.getLogger(__name__)
+
+    def cache_key(self, text):
+        """Get the key identifying speech for text with this engine and voice"""
+        return DiskCache.make_key(text, self.lang, self.slow, self.backend.name)
+
+    def synthesize(self, text, output_path):
+        """Write speech for text to output_path, calling the backend only for uncached chunks"""
+        chunks = (split_sentences(text) if self.chunked else None) or [text]
+        audio = [self.cache.read(self.cache_key(chunk), '.mp3') for chunk in chunks]
+        missing = [i for i, data in enumerate(audio) if data is None]
+        self.logger.info(f"TTS: {len(chunks) - len(missing)} of {len(chunks)} chunks cached")
+
+        if missing:
+            self.logger.info(f"Synthesizing {len(missing)} chunks with {self.backend.name}")
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(missing))) as executor:
+                results = executor.map(
+                    lambda i: self.backend.synthesize_bytes(chunks[i], self.lang, self.slow), missing
+                )
+                for i, data in zip(missing, results):
+                    audio[i] = data
+                    self.cache.put_bytes(self.cache_key(chunks[i]), data, '.mp3', evict=False)
+            self.cache.evict()
+
+        with open(output_path, 'wb') as f:
+            for data in audio:
+                f.write(data)
+
+def create_tts(settings, backend=None):
+    """Create a cached TTS from settings['tts'], optionally with an explicit backend"""
+    tts_settings = settings.get('tts', {})
+    if backend is None:
+        engine = tts_settings.get('engine', 'gtts')
+        if engine not in TTS_BACKENDS:
+            raise ValueError(f"Unknown TTS engine: {engine}")
+        backend = TTS_BACKENDS[engine]()
+
+    cache = DiskCache(
+        os.path.join(settings['paths']['cache_dir'], 'tts'),
+        int(tts_settings.get('cache_max_mb', 200)) * 1024 * 1024
+    )
+    return CachedTTS(
+        backend, cache, tts_settings.get('lang', 'en'), tts_settings.get('slow', False),
+        chunked=tts_settings.get('chunk_sentences', True), workers=tts_settings.get('workers', 4)
+    )
@@ -1,12 +1,34 @@
 import os
+import re
+import hashlib
 import logging
 import subprocess
 from datetime import datetime
 
 def ensure_dir_exists(path):
     """Create directory if it doesn't exist"""
-    if not os.path.exists(path):
-        os.makedirs(path)
+    # exist_ok avoids a race when several render workers create the same directory
+    os.makedirs(path, exist_ok=True)
+
+def safe_filename(name):
+    """Turn an arbitrary item id into a string usable as a file or directory name"""
+    safe = re.sub(r'[^A-Za-z0-9._-]+', '_', str(name)).strip('._') or 'item'
+    if safe != str(name):
+        # Keep ids that only differ in stripped characters apart
+        safe += '_' + hashlib.sha1(str(name).encode('utf-8')).hexdigest()[:8]
+    return safe
+
+def get_job_dir(temp_dir, item_id):
+    """Get the isolated scratch directory used to render a single item"""
+    return os.path.join(temp_dir, f"job_{safe_filename(item_id)}")
+
+def file_content_hash(path, chunk_size=1024 * 1024):
+    """Get the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 def setup_logging():
     """Configure logging to output to both file and console"""
@@ -36,6 +58,83 @@ def clean_text(text):
     text = ' '.join(text.split())
     return text
     
+# Bitrates in kbps by (MPEG-1, layer) and (MPEG-2/2.5, layer), indexed by the header's bitrate bits
+_MP3_BITRATES = {
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+# Sample rates by the header's version bits: MPEG-2.5, reserved, MPEG-2, MPEG-1
+_MP3_SAMPLE_RATES = {0: (11025, 12000, 8000), 2: (22050, 24000, 16000), 3: (44100, 48000, 32000)}
+
+def _parse_mp3_frame_header(data, pos):
+    """Get (frame length, seconds) of the MPEG audio frame starting at pos, or None if there is none"""
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+    version = (data[pos + 1] >> 3) & 3
+    layer = 4 - ((data[pos + 1] >> 1) & 3)
+    bitrate_index = data[pos + 2] >> 4
+    rate_index = (data[pos + 2] >> 2) & 3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (data[pos + 2] >> 1) & 1
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if mpeg1 or layer == 2 else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+    return length, samples / sample_rate
+
+def _mp3_frame_follows(data, pos):
+    """Check that a frame ending at pos is followed by another frame, a tag or the end of the data
+
+    Stray sync bytes can look like a valid header; requiring the next frame to
+    line up keeps such a fake frame from swallowing the start of a real one.
+    """
+    if pos + 4 > len(data):
+        return True
+    return data[pos:pos + 3] in (b'ID3', b'TAG') or _parse_mp3_frame_header(data, pos) is not None
+
+def get_mp3_duration(audio_path):
+    """Get an MP3's duration in seconds by walking its frame headers in-process
+
+    Every frame is counted, so files made of several concatenated MP3 streams,
+    as gTTS writes them, and VBR files are measured correctly.
+    """
+    with open(audio_path, 'rb') as f:
+        data = f.read()
+
+    duration = 0.0
+    pos = 0
+    while pos + 4 <= len(data):
+        if data[pos:pos + 3] == b'ID3' and pos + 10 <= len(data):
+            # Skip ID3v2 tags, their size is stored as a syncsafe integer
+            size = (data[pos + 6] << 21) | (data[pos + 7] << 14) | (data[pos + 8] << 7) | data[pos + 9]
+            pos += 10 + size + (10 if data[pos + 5] & 0x10 else 0)
+            continue
+        header = _parse_mp3_frame_header(data, pos)
+        if header is None or header[0] < 4 or not _mp3_frame_follows(data, pos + header[0]):
+            # Not a frame, resynchronize on the next sync byte
+            pos = data.find(b'\xff', pos + 1)
+            if pos < 0:
+                break
+            continue
+        length, seconds = header
+        frame = data[pos:pos + length]
+        # Xing/Info frames hold metadata, decoders don't play them
+        if b'Xing' not in frame[:64] and b'Info' not in frame[:64]:
+            duration += seconds
+        pos += length
+    return duration
+
 def get_video_duration(video_path):
     """Get video duration in seconds using ffprobe"""
     try:
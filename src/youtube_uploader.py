@@ -1,106 +1,247 @@
 import time
 import os
+from contextlib import contextmanager
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 import logging
+from browser_pool import BrowserSessionPool
+from metrics import metrics
+
+UPLOAD_ICON = (By.XPATH, '//*[@id="upload-icon"]')
+FILE_INPUT = (By.XPATH, '//*[@id="content"]/input')
+THUMBNAIL_INPUT = (By.XPATH, '//input[@type="file"][@accept="image/jpeg,image/png"]')
+THUMBNAIL_PREVIEW = (By.XPATH, '//ytcp-thumbnail-uploader//img[@src]')
+TITLE_INPUT = (By.XPATH, '//*[@id="textbox"]')
+DESCRIPTION_INPUT = (By.XPATH, '//ytcp-video-description//*[@id="textbox"]')
+UPLOAD_PROGRESS = (By.XPATH, '//ytcp-video-upload-progress//*[@role="progressbar"]')
+NOT_FOR_KIDS_RADIO = (By.NAME, "VIDEO_MADE_FOR_KIDS_NOT_MFK")
+NEXT_BUTTON = (By.ID, "next-button")
+VISIBILITY_RADIO = (By.XPATH, '//*[@id="privacy-radios"]/tp-yt-paper-radio-button[3]')
+DONE_BUTTON = (By.ID, "done-button")
+UPLOADS_DIALOG = (By.XPATH, '/html/body/ytcp-uploads-dialog/tp-yt-paper-dialog')
+
+DEFAULT_TIMEOUTS = {
+    'page_load': 180,   # Studio loading up to the upload icon
+    'step': 30,         # Any single dialog interaction
+    'upload': 1800,     # Upload and processing until the video can be published
+}
+
+def attribute_is_not(locator, attribute, value):
+    """Wait condition: the element exists and its attribute differs from value"""
+    def condition(driver):
+        elements = driver.find_elements(*locator)
+        return bool(elements) and elements[0].get_attribute(attribute) != value
+    return condition
+
+def attribute_is(locator, attribute, value):
+    """Wait condition: the element exists and its attribute equals value"""
+    def condition(driver):
+        elements = driver.find_elements(*locator)
+        return bool(elements) and elements[0].get_attribute(attribute) == value
+    return condition
+
+def progress_complete(locator):
+    """Wait condition: the progress bar exists and has reached its maximum"""
+    def condition(driver):
+        elements = driver.find_elements(*locator)
+        if not elements:
+            return False
+        value = elements[0].get_attribute('aria-valuenow')
+        maximum = elements[0].get_attribute('aria-valuemax') or '100'
+        try:
+            return float(value) >= float(maximum)
+        except (TypeError, ValueError):
+            return False
+    return condition
 
 class YouTubeUploader:
-    def __init__(self, chrome_driver_path):
+    def __init__(self, chrome_driver_path, settings=None):
+        """Initialize YouTubeUploader with optional settings['youtube'] values
+
+        Args:
+            chrome_driver_path (str): Path to chromedriver
+            settings (dict, optional): studio_url, per-step timeouts in seconds and
+                browser session pool options. With an empty debugger_addresses a new
+                Chrome is started with chrome_arguments instead of attaching to one.
+        """
+        settings = settings or {}
         self.chrome_driver_path = chrome_driver_path
+        self.studio_url = settings.get('studio_url', "https://studio.youtube.com")
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **settings.get('timeouts', {}))
+        self.debugger_addresses = settings.get('debugger_addresses', ["127.0.0.1:9222"])
+        self.chrome_arguments = settings.get('chrome_arguments', [])
         self.logger = logging.getLogger(__name__)
+        # Seconds spent in each step of the most recent upload
+        self.last_step_timings = {}
+        
+        # Warm browser sessions shared by all uploads, several can be in flight at once
+        self.session_pool = BrowserSessionPool(
+            self._setup_driver,
+            size=settings.get('sessions', 1),
+            max_uses=settings.get('session_max_uses', 20)
+        )
 
-    def _setup_driver(self):
+    def _setup_driver(self, index=0):
         chrome_options = Options()
-        chrome_options.add_experimental_option("debuggerAddress", "127.0.0.1:9222")
+        if self.debugger_addresses:
+            # Spread sessions over the configured browsers / profiles
+            chrome_options.add_experimental_option("debuggerAddress", self.debugger_addresses[index % len(self.debugger_addresses)])
+        else:
+            # Nothing to attach to, start a fresh browser, e.g. for a local copy of the dialog
+            for argument in self.chrome_arguments:
+                chrome_options.add_argument(argument)
         driver = webdriver.Chrome(options=chrome_options)
         return driver
 
+    def close(self):
+        """Quit all pooled browser sessions"""
+        self.session_pool.close()
+
+    def _wait(self, driver, timeout_name):
+        return WebDriverWait(driver, self.timeouts[timeout_name])
+
+    @contextmanager
+    def _step(self, timings, name):
+        """Time one upload step and record it in timings"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[name] = time.perf_counter() - start
+            metrics.observe('upload_step_seconds', timings[name], step=name)
+
     def _navigate_to_upload(self, driver):
-        driver.get("https://studio.youtube.com")
-        wait = WebDriverWait(driver, 180)
-        upload_button = wait.until(EC.element_to_be_clickable(
-            (By.XPATH, '//*[@id="upload-icon"]')))
+        upload_button = None
+        if driver.current_url.startswith(self.studio_url):
+            # A warm session is already on Studio, skip the full page load if it still responds
+            try:
+                upload_button = self._wait(driver, 'step').until(EC.element_to_be_clickable(UPLOAD_ICON))
+            except TimeoutException:
+                self.logger.warning("Warm Studio page is unresponsive, reloading")
+        if upload_button is None:
+            driver.get(self.studio_url)
+            upload_button = self._wait(driver, 'page_load').until(EC.element_to_be_clickable(UPLOAD_ICON))
         upload_button.click()
-        time.sleep(3)
+        self._wait(driver, 'step').until(EC.presence_of_element_located(FILE_INPUT))
 
     def _upload_file(self, driver, video_path):
-        file_input = driver.find_element(By.XPATH, '//*[@id="content"]/input')
+        file_input = driver.find_element(*FILE_INPUT)
         abs_path = os.path.abspath(video_path)
         file_input.send_keys(abs_path)
-        time.sleep(7)
+        # The metadata editor opens once the upload has been accepted
+        self._wait(driver, 'step').until(EC.element_to_be_clickable(TITLE_INPUT))
+
+    def _set_thumbnail(self, driver, thumbnail_path):
+        thumbnail_input = self._wait(driver, 'step').until(EC.presence_of_element_located(THUMBNAIL_INPUT))
+        thumbnail_input.send_keys(os.path.abspath(thumbnail_path))
+        # The preview shows up once Studio has accepted the image
+        self._wait(driver, 'step').until(EC.visibility_of_element_located(THUMBNAIL_PREVIEW))
 
     def _set_title_description(self, driver, title, description):
         # Başlık alanını temizle ve yeni başlığı gir
-        title_input = driver.find_element(
-            By.XPATH, '//*[@id="textbox"]')
+        title_input = self._wait(driver, 'step').until(EC.element_to_be_clickable(TITLE_INPUT))
         driver.execute_script("arguments[0].innerText = '';", title_input)
         title_input.send_keys(title)
-        
+        self._wait(driver, 'step').until(EC.text_to_be_present_in_element(TITLE_INPUT, title))
+
         # Açıklama alanını bul ve metni gir
-        desc_input = driver.find_element(
-            By.XPATH, '/html/body/ytcp-uploads-dialog/tp-yt-paper-dialog/div/ytcp-animatable[1]/ytcp-ve/ytcp-video-metadata-editor/div/ytcp-video-metadata-editor-basics/div[2]/ytcp-video-description/div/ytcp-social-suggestions-textbox/ytcp-form-input-container/div[1]/div[2]/div/ytcp-social-suggestion-input/div')
+        desc_input = self._wait(driver, 'step').until(EC.element_to_be_clickable(DESCRIPTION_INPUT))
         desc_input.send_keys(description)
-        time.sleep(3)
 
     def _set_not_made_for_kids(self, driver):
         try:
-            not_for_kids_radio = driver.find_element(
-                By.NAME, "VIDEO_MADE_FOR_KIDS_NOT_MFK")
+            not_for_kids_radio = self._wait(driver, 'step').until(EC.element_to_be_clickable(NOT_FOR_KIDS_RADIO))
             not_for_kids_radio.click()
+            self._wait(driver, 'step').until(attribute_is(NOT_FOR_KIDS_RADIO, 'aria-checked', 'true'))
         except Exception as e:
             self.logger.error(f"Could not set 'Not made for kids': {str(e)}")
-        time.sleep(3)
 
     def _set_visibility(self, driver, visibility="unlisted"):
         # Next butonlarına tıkla
         for _ in range(3):
-            next_button = driver.find_element(By.ID, "next-button")
+            next_button = self._wait(driver, 'step').until(EC.element_to_be_clickable(NEXT_BUTTON))
             next_button.click()
-            time.sleep(1)
 
         # Visibility radio butonunu bul ve tıkla
         try:
-            visibility_radio = driver.find_element(
-                By.XPATH, '//*[@id="privacy-radios"]/tp-yt-paper-radio-button[3]')
+            visibility_radio = self._wait(driver, 'step').until(EC.element_to_be_clickable(VISIBILITY_RADIO))
             visibility_radio.click()
-            time.sleep(2)
+            self._wait(driver, 'step').until(attribute_is(VISIBILITY_RADIO, 'aria-checked', 'true'))
         except Exception as e:
             self.logger.error(f"Could not set visibility: {str(e)}")
             raise
 
+    def _wait_for_upload(self, driver):
+        # The file keeps transferring in the background while the metadata is filled in
+        self._wait(driver, 'upload').until(progress_complete(UPLOAD_PROGRESS))
+
+    def _publish(self, driver):
+        # The done button stays disabled until the checks after the upload have finished
+        self._wait(driver, 'upload').until(attribute_is_not(DONE_BUTTON, 'aria-disabled', 'true'))
+        driver.find_element(*DONE_BUTTON).click()
+        try:
+            self._wait(driver, 'step').until(EC.invisibility_of_element_located(UPLOADS_DIALOG))
+        except TimeoutException:
+            # The video is already published at this point, only the dialog is slow to close
+            self.logger.warning("Upload dialog did not close after publishing")
+
     def upload_video(self, video_path, title, description, thumbnail_path=None):
         """Upload a video to YouTube.
-        
+
         Args:
             video_path (str): Path to the video file
             title (str): Video title
             description (str): Video description
             thumbnail_path (str, optional): Path to thumbnail image
         """
+        timings = {}
+        session = None
+        failed = True
+        # Set from selecting the file until the transfer is confirmed complete
+        upload_in_flight = False
         try:
-            driver = self._setup_driver()
-            self._navigate_to_upload(driver)
-            self._upload_file(driver, video_path)
-            
+            with self._step(timings, 'connect'):
+                session = self.session_pool.acquire(timeout=self.timeouts['page_load'])
+                driver = session.driver
+            with self._step(timings, 'navigate'):
+                self._navigate_to_upload(driver)
+            with self._step(timings, 'select_file'):
+                upload_in_flight = True
+                self._upload_file(driver, video_path)
+
             if thumbnail_path:
-                thumbnail_input = driver.find_element(By.XPATH, '//input[@type="file"][@accept="image/jpeg,image/png"]')
-                abs_thumb_path = os.path.abspath(thumbnail_path)
-                thumbnail_input.send_keys(abs_thumb_path)
-                time.sleep(3)
-            
-            self._set_title_description(driver, title, description)
-            self._set_not_made_for_kids(driver)
-            self._set_visibility(driver)
-            
-            done_button = driver.find_element(By.ID, "done-button")
-            done_button.click()
-            
+                with self._step(timings, 'thumbnail'):
+                    self._set_thumbnail(driver, thumbnail_path)
+
+            with self._step(timings, 'title_description'):
+                self._set_title_description(driver, title, description)
+            with self._step(timings, 'made_for_kids'):
+                self._set_not_made_for_kids(driver)
+            with self._step(timings, 'visibility'):
+                self._set_visibility(driver)
+            with self._step(timings, 'upload_progress'):
+                self._wait_for_upload(driver)
+            upload_in_flight = False
+            with self._step(timings, 'publish'):
+                self._publish(driver)
+
             self.logger.info("Video upload completed successfully")
+            failed = False
             return True
-            
+
         except Exception as e:
             self.logger.error(f"Error uploading video: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
+
+        finally:
+            if session is not None:
+                # A failed upload may leave the tab mid-dialog, so that session is recycled
+                self.session_pool.release(session, error=failed, upload_in_flight=upload_in_flight)
+            self.last_step_timings = timings
+            metrics.inc('uploads', result='failed' if failed else 'success')
+            summary = ", ".join(f"{name}={seconds:.1f}s" for name, seconds in timings.items())
+            self.logger.info(f"Upload step timings: {summary}")
@@ -0,0 +1,53 @@
+from browser_pool import BrowserSessionPool
+
+class FakeDriver:
+    def __init__(self):
+        self.closed = False
+        self.quit_called = False
+        self.current_url = 'about:blank'
+        self.current_window_handle = 'tab'
+        self.switch_to = self
+
+    def new_window(self, kind):
+        pass
+
+    def window(self, handle):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def quit(self):
+        self.quit_called = True
+
+def make_pool(max_uses=20):
+    drivers = []
+
+    def factory(index):
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    return BrowserSessionPool(factory, size=1, max_uses=max_uses), drivers
+
+def test_session_is_reused_until_max_uses():
+    pool, drivers = make_pool(max_uses=2)
+    session = pool.acquire()
+    pool.release(session)
+    assert pool.acquire() is session
+    pool.release(session)
+    assert drivers[0].closed and drivers[0].quit_called
+    assert pool.acquire() is not session
+    assert len(drivers) == 2
+
+def test_error_recycles_session_and_closes_its_tab():
+    pool, drivers = make_pool()
+    pool.release(pool.acquire(), error=True)
+    assert drivers[0].closed and drivers[0].quit_called
+
+def test_tab_with_upload_in_flight_is_left_open():
+    pool, drivers = make_pool()
+    session = pool.acquire()
+    pool.release(session, error=True, upload_in_flight=True)
+    assert not drivers[0].closed and drivers[0].quit_called
+    # The slot is free again for a fresh session
+    assert pool.acquire() is not session
@@ -0,0 +1,66 @@
+import json
+import pytest
+from content_source import ContentSource, parse_shard, shard_of
+
+ITEMS = [
+    {'id': 'plain', 'title': 'Title', 'images': ['a.jpg', 'b.jpg']},
+    {'id': 'tricky', 'title': 'Brackets ] [ } {, commas, "quotes" and \\ backslashes', 'images': []},
+    {'id': 'unicode', 'title': 'Türkçe başlık ✓', 'nested': {'list': [1, 2.5, None, True]}},
+    {'id': 42, 'description': '\n\t escaped whitespace'},
+]
+
+def write_array(path, items, indent=4):
+    path.write_text(json.dumps(items, indent=indent, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 16, 64 * 1024])
+def test_json_array_streams_across_chunk_boundaries(tmp_path, chunk_size):
+    path = write_array(tmp_path / 'content.json', ITEMS)
+    assert list(ContentSource(path, chunk_size=chunk_size)) == ITEMS
+
+@pytest.mark.parametrize('text', ['[]', '  [ ]  ', '\n[\n]\n'])
+def test_empty_arrays(tmp_path, text):
+    path = tmp_path / 'content.json'
+    path.write_text(text)
+    assert list(ContentSource(str(path), chunk_size=2)) == []
+
+def test_compact_array(tmp_path):
+    path = write_array(tmp_path / 'content.json', ITEMS, indent=None)
+    assert list(ContentSource(path, chunk_size=5)) == ITEMS
+
+def test_truncated_array_raises(tmp_path):
+    path = tmp_path / 'content.json'
+    path.write_text(json.dumps(ITEMS)[:-20])
+    with pytest.raises(ValueError):
+        list(ContentSource(str(path), chunk_size=8))
+
+def test_not_an_array_raises(tmp_path):
+    path = tmp_path / 'content.json'
+    path.write_text(json.dumps(ITEMS[0]))
+    with pytest.raises(ValueError):
+        list(ContentSource(str(path)))
+
+def test_jsonl_skips_blank_and_invalid_lines(tmp_path):
+    path = tmp_path / 'content.jsonl'
+    lines = [json.dumps(item) for item in ITEMS]
+    path.write_text("\n".join([lines[0], '', '{not json', lines[1], '  ', *lines[2:]]) + "\n")
+    assert list(ContentSource(str(path))) == ITEMS
+
+def test_shards_partition_the_catalog(tmp_path):
+    items = [{'id': f"item{i}"} for i in range(50)]
+    path = write_array(tmp_path / 'content.json', items)
+    shards = [list(ContentSource(path, shard=(index, 3))) for index in range(3)]
+    assert sorted((item['id'] for shard in shards for item in shard), key=lambda i: int(i[4:])) == [
+        item['id'] for item in items
+    ]
+    assert all(shard_of(item['id'], 3) == index for index, shard in enumerate(shards) for item in shard)
+
+def test_is_done_filters_items(tmp_path):
+    path = write_array(tmp_path / 'content.json', ITEMS)
+    done = {'plain', 42}
+    assert [item['id'] for item in ContentSource(path, is_done=lambda item_id: item_id in done)] == ['tricky', 'unicode']
+
+@pytest.mark.parametrize('value', ['1', '2/2', '-1/2', 'a/b', '0/0'])
+def test_parse_shard_rejects_invalid_specs(value):
+    with pytest.raises(ValueError):
+        parse_shard(value)
@@ -0,0 +1,101 @@
+import os
+import socket
+import subprocess
+import multiprocessing
+from job_store import JobStore, PENDING, RENDERING, RENDERED, DONE, FAILED
+
+ITEM_IDS = [f"item{i}" for i in range(40)]
+
+def _claim_all(db_path):
+    store = JobStore(db_path)
+    return [item_id for item_id in ITEM_IDS if store.claim(item_id)]
+
+def _claim_next_until_empty(db_path):
+    store = JobStore(db_path)
+    claimed = []
+    while True:
+        item_id = store.claim_next()
+        if item_id is None:
+            return claimed
+        claimed.append(item_id)
+
+def test_claim_is_atomic_across_processes(tmp_path):
+    db_path = str(tmp_path / 'jobs.sqlite3')
+    JobStore(db_path)
+    with multiprocessing.Pool(4) as pool:
+        results = pool.map(_claim_all, [db_path] * 4)
+    claimed = [item_id for result in results for item_id in result]
+    assert sorted(claimed) == sorted(ITEM_IDS)
+
+def test_claim_next_hands_out_each_item_once_across_processes(tmp_path):
+    db_path = str(tmp_path / 'jobs.sqlite3')
+    JobStore(db_path).add(ITEM_IDS)
+    with multiprocessing.Pool(4) as pool:
+        results = pool.map(_claim_next_until_empty, [db_path] * 4)
+    claimed = [item_id for result in results for item_id in result]
+    assert sorted(claimed) == sorted(ITEM_IDS)
+
+def test_claim_respects_state_and_max_attempts(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    assert store.claim('a', max_attempts=2)
+    assert not store.claim('a', max_attempts=2)
+    store.set_state('a', FAILED, 'boom')
+    assert store.claim('a', max_attempts=2)
+    store.set_state('a', FAILED, 'boom')
+    assert not store.claim('a', max_attempts=2)
+    assert store.get('a')['last_error'] == 'boom'
+
+def test_set_state_registers_unknown_items(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    store.set_state('new', DONE)
+    assert store.is_done('new')
+
+def test_import_completed_again_when_file_changes(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    completed = tmp_path / 'completed.txt'
+    completed.write_text("a\n")
+    assert store.import_completed(str(completed)) == 1
+    assert store.import_completed(str(completed)) == 0
+    completed.write_text("a\nb\n")
+    store.import_completed(str(completed))
+    assert store.is_done('b')
+
+def _set_holder(store, item_id, claimed_by, updated_at='2000-01-01T00:00:00'):
+    store._conn().execute(
+        "UPDATE jobs SET claimed_by = ?, updated_at = ? WHERE item_id = ?", (claimed_by, updated_at, item_id)
+    )
+
+def test_reset_stale_checks_the_holder(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    for item_id in ('dead', 'live', 'remote_old', 'remote_fresh'):
+        store.claim(item_id)
+    store.set_state('live', RENDERED)
+    host = socket.gethostname()
+    exited = subprocess.Popen(['true'])
+    exited.wait()
+    _set_holder(store, 'dead', f"{host}:{exited.pid}")
+    # Held by this very process for a long time, e.g. behind an upload rate limit
+    _set_holder(store, 'live', f"{host}:{os.getpid()}")
+    _set_holder(store, 'remote_old', 'elsewhere:1')
+    _set_holder(store, 'remote_fresh', 'elsewhere:1', updated_at='2999-01-01T00:00:00')
+
+    assert store.reset_stale(3600) == 2
+    assert store.get_state('dead') == PENDING
+    assert store.get_state('live') == RENDERED
+    assert store.get_state('remote_old') == PENDING
+    assert store.get_state('remote_fresh') == RENDERING
+
+def test_touch_keeps_held_items_fresh(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    store.claim('a')
+    _set_holder(store, 'a', store.worker_id)
+    store.touch(['a'])
+    assert store.get('a')['updated_at'] > '2000-01-01T00:00:00'
+
+def test_release_returns_items_without_counting_the_attempt(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    store.claim('a')
+    store.set_state('a', RENDERED)
+    assert store.release(['a']) == 1
+    job = store.get('a')
+    assert (job['state'], job['attempts'], job['claimed_by']) == (PENDING, 0, None)
@@ -0,0 +1,61 @@
+import shutil
+import subprocess
+import pytest
+from utils import get_mp3_duration
+
+# MPEG-1 Layer III, 32 kbps, 44.1 kHz, mono: 104 bytes and 1152 samples per frame
+MPEG1_FRAME = bytes([0xFF, 0xFB, 0x10, 0xC4]) + bytes(100)
+MPEG1_SECONDS = 1152 / 44100
+# MPEG-2 Layer III, 32 kbps, 22.05 kHz: 104 bytes and 576 samples per frame
+MPEG2_FRAME = bytes([0xFF, 0xF3, 0x40, 0xC4]) + bytes(100)
+MPEG2_SECONDS = 576 / 22050
+
+def id3v2_tag(payload):
+    size = len(payload)
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    return b'ID3' + bytes([4, 0, 0]) + syncsafe + payload
+
+def write(tmp_path, data):
+    path = tmp_path / 'audio.mp3'
+    path.write_bytes(data)
+    return str(path)
+
+def test_counts_every_frame(tmp_path):
+    assert get_mp3_duration(write(tmp_path, MPEG1_FRAME * 100)) == pytest.approx(100 * MPEG1_SECONDS)
+
+def test_mpeg2_frames(tmp_path):
+    assert get_mp3_duration(write(tmp_path, MPEG2_FRAME * 50)) == pytest.approx(50 * MPEG2_SECONDS)
+
+def test_skips_id3v2_tags_containing_sync_bytes(tmp_path):
+    tag = id3v2_tag(MPEG1_FRAME * 3 + b'\xff\xfb')
+    assert get_mp3_duration(write(tmp_path, tag + MPEG1_FRAME * 10)) == pytest.approx(10 * MPEG1_SECONDS)
+
+def test_concatenated_streams(tmp_path):
+    # gTTS writes several MP3 streams back to back, each with its own tag
+    data = id3v2_tag(b'TIT2') + MPEG1_FRAME * 10 + id3v2_tag(b'TIT2') + MPEG1_FRAME * 20
+    assert get_mp3_duration(write(tmp_path, data)) == pytest.approx(30 * MPEG1_SECONDS)
+
+def test_xing_frame_is_not_counted(tmp_path):
+    xing = bytearray(MPEG1_FRAME)
+    xing[21:25] = b'Xing'
+    assert get_mp3_duration(write(tmp_path, bytes(xing) + MPEG1_FRAME * 10)) == pytest.approx(10 * MPEG1_SECONDS)
+
+def test_resyncs_after_garbage(tmp_path):
+    data = b'junk\xff\x00' + MPEG1_FRAME * 5 + b'\xff\xff\x12' + MPEG1_FRAME * 5 + b'\xff'
+    assert get_mp3_duration(write(tmp_path, data)) == pytest.approx(10 * MPEG1_SECONDS)
+
+def test_empty_and_non_mp3_files(tmp_path):
+    assert get_mp3_duration(write(tmp_path, b'')) == 0
+    assert get_mp3_duration(write(tmp_path, b'not an mp3 at all' * 10)) == 0
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="needs ffmpeg")
+def test_matches_an_encoded_file(tmp_path):
+    path = str(tmp_path / 'encoded.mp3')
+    result = subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=44100',
+        '-t', '2.5', '-c:a', 'libmp3lame', '-b:a', '64k', path
+    ], capture_output=True)
+    if result.returncode != 0:
+        pytest.skip("ffmpeg has no MP3 encoder")
+    # Encoder delay and padding add up to about two frames
+    assert get_mp3_duration(path) == pytest.approx(2.5, abs=0.06)
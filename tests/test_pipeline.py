@@ -0,0 +1,139 @@
+import time
+import threading
+from pipeline import Pipeline
+from job_store import JobStore, PENDING, RENDERED, DONE, FAILED
+
+def make_items(count):
+    return [{'id': f"item{i}"} for i in range(count)]
+
+def make_settings(queue_size=2, upload_workers=1, stale_after=3600):
+    return {
+        'pipeline': {'queue_size': queue_size, 'upload_workers': upload_workers, 'upload_delay': 0},
+        'jobs': {'max_attempts': 3, 'stale_after': stale_after},
+    }
+
+class FakeRenderPool:
+    """Render items lazily, failing the ids in fail"""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.rendered = []
+
+    def render(self, items):
+        for item in items:
+            self.rendered.append(item['id'])
+            yield item, None if item['id'] in self.fail else f"{item['id']}.mp4"
+
+class BlockingLimiter:
+    """Hold every upload back until the pipeline stops"""
+
+    def __init__(self):
+        self.waiting = threading.Event()
+
+    def acquire(self, stop_event):
+        self.waiting.set()
+        stop_event.wait()
+        return False
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.01)
+
+def test_run_counts_rendered_and_uploaded_items(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    uploaded = []
+
+    def upload(item, video_path):
+        uploaded.append((item['id'], video_path))
+        return item['id'] != 'item3'
+
+    pipeline = Pipeline(make_settings(upload_workers=2), FakeRenderPool(fail={'item1'}), upload, job_store=store)
+    stats = pipeline.run(make_items(5))
+
+    assert stats == {'rendered': 4, 'render_failed': 1, 'uploaded': 3, 'upload_failed': 1}
+    assert sorted(uploaded) == [('item0', 'item0.mp4'), ('item2', 'item2.mp4'), ('item3', 'item3.mp4'), ('item4', 'item4.mp4')]
+    assert store.counts() == {DONE: 3, FAILED: 2}
+
+def test_full_queue_holds_back_rendering():
+    render_pool = FakeRenderPool()
+    release = threading.Event()
+
+    def upload(item, video_path):
+        release.wait()
+        return True
+
+    pipeline = Pipeline(make_settings(queue_size=1), render_pool, upload)
+    runner = threading.Thread(target=pipeline.run, args=(make_items(10),))
+    runner.start()
+    # One item uploading, one queued and one rendered item waiting for a free queue slot
+    wait_until(lambda: len(render_pool.rendered) == 3)
+    time.sleep(0.2)
+    assert len(render_pool.rendered) == 3
+
+    release.set()
+    runner.join(5)
+    assert not runner.is_alive()
+    assert pipeline.stats['uploaded'] == 10
+
+def test_cancel_hands_held_items_back(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    limiter = BlockingLimiter()
+    pipeline = Pipeline(make_settings(queue_size=1), FakeRenderPool(), lambda item, path: True,
+                        job_store=store, limiters=[limiter])
+    pipeline.start()
+    renderer = threading.Thread(target=pipeline.render, args=(make_items(5),))
+    renderer.start()
+    limiter.waiting.wait(5)
+    wait_until(lambda: store.counts().get(RENDERED) == 3)
+
+    pipeline.cancel()
+    renderer.join(5)
+    assert not renderer.is_alive()
+    pipeline.stop(wait=False)
+
+    assert store.counts() == {PENDING: 3}
+    assert all(store.get(item['id'])['attempts'] == 0 for item in make_items(3))
+    assert pipeline.stats['uploaded'] == 0
+
+def test_stop_without_wait_skips_queued_uploads(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    started = threading.Event()
+    release = threading.Event()
+
+    def upload(item, video_path):
+        started.set()
+        release.wait()
+        return True
+
+    pipeline = Pipeline(make_settings(queue_size=2), FakeRenderPool(), upload, job_store=store)
+    pipeline.start()
+    pipeline.render(make_items(3))
+    started.wait(5)
+    stopper = threading.Thread(target=pipeline.stop, kwargs={'wait': False})
+    stopper.start()
+    # The upload already running finishes, the queued ones are handed back
+    release.set()
+    stopper.join(5)
+    assert not stopper.is_alive()
+
+    assert store.counts() == {DONE: 1, PENDING: 2}
+    assert pipeline.stats['uploaded'] == 1
+
+def test_heartbeat_refreshes_held_items(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    limiter = BlockingLimiter()
+    pipeline = Pipeline(make_settings(queue_size=1, stale_after=3), FakeRenderPool(), lambda item, path: True,
+                        job_store=store, limiters=[limiter])
+    pipeline.start()
+    try:
+        renderer = threading.Thread(target=pipeline.render, args=(make_items(1),))
+        renderer.start()
+        limiter.waiting.wait(5)
+        renderer.join(5)
+        store._conn().execute("UPDATE jobs SET updated_at = '2000-01-01T00:00:00'")
+        wait_until(lambda: store.get('item0')['updated_at'] > '2000-01-01T00:00:00')
+        assert store.get_state('item0') == RENDERED
+    finally:
+        pipeline.stop(wait=False)
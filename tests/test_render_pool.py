@@ -0,0 +1,32 @@
+import render_pool
+from render_pool import RenderPool
+
+class FakeVideoCreator:
+    def create_video(self, title, description, images, audio_text, item_id):
+        return f"{item_id}.mp4"
+
+def make_item(item_id, **overrides):
+    item = {'id': item_id, 'title': 'Title', 'description': '', 'images': [], 'audio_text': 'Hello.'}
+    item.update(overrides)
+    return item
+
+def test_single_worker_reports_malformed_item_as_failed(monkeypatch):
+    monkeypatch.setattr(render_pool, '_video_creator', FakeVideoCreator())
+    items = [make_item('a'), make_item('b'), make_item('c')]
+    del items[1]['audio_text']
+    results = list(RenderPool({'render': {'workers': 1}}).render(items))
+    assert [(item['id'], path) for item, path in results] == [('a', 'a.mp4'), ('b', None), ('c', 'c.mp4')]
+
+def test_single_worker_stops_rendering_when_consumer_stops(monkeypatch):
+    monkeypatch.setattr(render_pool, '_video_creator', FakeVideoCreator())
+    pulled = []
+
+    def items():
+        for item_id in 'abc':
+            pulled.append(item_id)
+            yield make_item(item_id)
+
+    results = RenderPool({'render': {'workers': 1}}).render(items())
+    next(results)
+    results.close()
+    assert pulled == ['a']
@@ -0,0 +1,92 @@
+import threading
+from datetime import datetime, timedelta
+import pytest
+from scheduling import TokenBucket, PublishSchedule, create_upload_limiters
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def test_token_bucket_allows_a_burst_then_goes_into_debt():
+    clock = FakeClock(0.0)
+    bucket = TokenBucket(rate=1, capacity=2, clock=clock)
+    assert [bucket._reserve() for _ in range(4)] == [0, 0, 1, 2]
+    # Three seconds pay off the debt of two tokens and refill one
+    clock.now = 3.0
+    assert [bucket._reserve() for _ in range(2)] == [0, 1]
+
+def test_token_bucket_refills_up_to_capacity():
+    clock = FakeClock(0.0)
+    bucket = TokenBucket(rate=0.5, capacity=2, clock=clock)
+    bucket._reserve()
+    clock.now = 100.0
+    assert [bucket._reserve() for _ in range(3)] == [0, 0, 2]
+
+def test_token_bucket_gives_concurrent_workers_distinct_waits():
+    bucket = TokenBucket(rate=2, capacity=1, clock=FakeClock(0.0))
+    delays = []
+    lock = threading.Lock()
+
+    def reserve():
+        delay = bucket._reserve()
+        with lock:
+            delays.append(delay)
+
+    threads = [threading.Thread(target=reserve) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(delays) == [i * 0.5 for i in range(8)]
+
+def test_token_bucket_acquire_stops_early():
+    bucket = TokenBucket(rate=1 / 3600, capacity=1, clock=FakeClock(0.0))
+    stop_event = threading.Event()
+    assert bucket.acquire(stop_event)
+    stop_event.set()
+    assert not bucket.acquire(stop_event)
+
+def test_token_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+def test_publish_schedule_hands_each_slot_out_once():
+    clock = FakeClock(datetime(2024, 5, 1, 8, 0))
+    schedule = PublishSchedule(['18:00', '09:00'], clock=clock)
+    slots = [schedule._reserve() for _ in range(3)]
+    assert slots == [datetime(2024, 5, 1, 9, 0), datetime(2024, 5, 1, 18, 0), datetime(2024, 5, 2, 9, 0)]
+
+def test_publish_schedule_uses_a_slot_within_grace():
+    clock = FakeClock(datetime(2024, 5, 1, 9, 10))
+    schedule = PublishSchedule(['09:00', '18:00'], grace=900, clock=clock)
+    # The 09:00 slot started ten minutes ago, so the upload goes out right away
+    assert schedule.acquire(threading.Event())
+    assert schedule._last_slot == datetime(2024, 5, 1, 9, 0)
+
+def test_publish_schedule_skips_slots_missed_beyond_grace():
+    clock = FakeClock(datetime(2024, 5, 1, 9, 20))
+    schedule = PublishSchedule(['09:00', '18:00'], grace=900, clock=clock)
+    assert schedule._reserve() == datetime(2024, 5, 1, 18, 0)
+    # Slots missed while idle are not caught up in a burst either
+    clock.now = datetime(2024, 5, 2, 20, 0)
+    assert schedule._reserve() == datetime(2024, 5, 3, 9, 0)
+
+def test_publish_schedule_acquire_stops_early():
+    schedule = PublishSchedule(['09:00'], clock=FakeClock(datetime(2024, 5, 1, 8, 0)))
+    stop_event = threading.Event()
+    stop_event.set()
+    assert not schedule.acquire(stop_event)
+
+def test_create_upload_limiters_from_settings():
+    settings = {
+        'pipeline': {'uploads_per_hour': 12, 'upload_burst': 3},
+        'daemon': {'publish_times': ['09:00'], 'publish_grace': 60},
+    }
+    assert create_upload_limiters({}) == []
+    assert [type(limiter) for limiter in create_upload_limiters(settings)] == [TokenBucket]
+    schedule, bucket = create_upload_limiters(settings, schedule=True)
+    assert schedule.grace == timedelta(seconds=60)
+    assert (bucket.rate, bucket.capacity) == (12 / 3600, 3)
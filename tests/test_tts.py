@@ -0,0 +1,55 @@
+import pytest
+from tts import TTSBackend, StubTTSBackend, create_tts, split_sentences
+from utils import get_mp3_duration
+
+TEXT = "The first sentence. The second one is longer than the first! Is this the third? Yes."
+
+def make_tts(tmp_path, chunk_sentences=True):
+    settings = {
+        'paths': {'cache_dir': str(tmp_path / 'cache')},
+        'tts': {'lang': 'en', 'chunk_sentences': chunk_sentences, 'workers': 2},
+    }
+    backend = StubTTSBackend()
+    return create_tts(settings, backend=backend), backend
+
+def test_cold_run_synthesizes_each_sentence(tmp_path):
+    tts, backend = make_tts(tmp_path)
+    tts.synthesize(TEXT, str(tmp_path / 'out.mp3'))
+    assert backend.calls == 4
+
+def test_warm_run_makes_no_calls(tmp_path):
+    tts, backend = make_tts(tmp_path)
+    tts.synthesize(TEXT, str(tmp_path / 'cold.mp3'))
+    backend.calls = 0
+    tts.synthesize(TEXT, str(tmp_path / 'warm.mp3'))
+    assert backend.calls == 0
+    assert (tmp_path / 'warm.mp3').read_bytes() == (tmp_path / 'cold.mp3').read_bytes()
+
+def test_editing_one_sentence_synthesizes_only_that_chunk(tmp_path):
+    tts, backend = make_tts(tmp_path)
+    tts.synthesize(TEXT, str(tmp_path / 'before.mp3'))
+    calls = backend.calls
+    tts.synthesize(TEXT.replace("Is this the third?", "Is this really the third one?"), str(tmp_path / 'after.mp3'))
+    assert backend.calls == calls + 1
+
+def test_unchunked_text_is_a_single_chunk(tmp_path):
+    tts, backend = make_tts(tmp_path, chunk_sentences=False)
+    tts.synthesize(TEXT, str(tmp_path / 'out.mp3'))
+    assert backend.calls == 1
+
+def test_joined_duration_is_the_sum_of_the_chunks(tmp_path):
+    tts, _ = make_tts(tmp_path)
+    tts.synthesize(TEXT, str(tmp_path / 'joined.mp3'))
+    expected = 0
+    for i, sentence in enumerate(split_sentences(TEXT)):
+        chunk_path = tmp_path / f"chunk{i}.mp3"
+        chunk_path.write_bytes(StubTTSBackend().synthesize_bytes(sentence, 'en', False))
+        expected += get_mp3_duration(str(chunk_path))
+    assert get_mp3_duration(str(tmp_path / 'joined.mp3')) == pytest.approx(expected)
+
+def test_backend_without_synthesize_cannot_be_created():
+    class IncompleteBackend(TTSBackend):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()
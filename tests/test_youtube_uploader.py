@@ -0,0 +1,47 @@
+import os
+import shutil
+import pathlib
+import pytest
+
+pytest.importorskip('selenium')
+from youtube_uploader import YouTubeUploader
+
+DIALOG_PATH = pathlib.Path(__file__).resolve().parent / 'upload_dialog.html'
+CHROME = next(filter(None, map(shutil.which, ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome'))), None)
+
+pytestmark = pytest.mark.skipif(CHROME is None, reason="Chrome is not installed")
+
+@pytest.fixture
+def uploader():
+    uploader = YouTubeUploader(None, {
+        'studio_url': DIALOG_PATH.as_uri(),
+        'debugger_addresses': [],
+        'chrome_arguments': ['--headless=new', '--no-sandbox', '--disable-dev-shm-usage'],
+        'timeouts': {'page_load': 30, 'step': 10, 'upload': 30},
+    })
+    yield uploader
+    uploader.close()
+
+def test_upload_video_against_local_dialog(uploader, tmp_path):
+    video_path = tmp_path / 'video.mp4'
+    video_path.write_bytes(b'\0' * 1024)
+    thumbnail_path = tmp_path / 'thumb.png'
+    thumbnail_path.write_bytes(b'\0' * 64)
+
+    assert uploader.upload_video(str(video_path), "A title", "A description", str(thumbnail_path))
+
+    assert list(uploader.last_step_timings) == [
+        'connect', 'navigate', 'select_file', 'thumbnail', 'title_description',
+        'made_for_kids', 'visibility', 'upload_progress', 'publish',
+    ]
+    assert all(seconds >= 0 for seconds in uploader.last_step_timings.values())
+
+    with uploader.session_pool.session() as session:
+        published = session.driver.execute_script("return window.published")
+    assert published == {
+        'title': "A title",
+        'description': "A description",
+        'made_for_kids': 'VIDEO_MADE_FOR_KIDS_NOT_MFK',
+        'visibility': 'UNLISTED',
+        'thumbnail': 'thumb.png',
+    }